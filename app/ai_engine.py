@@ -10,74 +10,832 @@ import json
 import numpy as np
 from typing import Dict, List, Tuple, Optional
 from PIL import Image
-import torch
-from transformers import pipeline
-from sentence_transformers import SentenceTransformer
-import easyocr
-from ultralytics import YOLO
-import cv2
-from sklearn.metrics.pairwise import cosine_similarity
 import logging
+import math
 import mojimoji
 import re
-from app.classification_service import SemanticClassifier
+import difflib
+import atexit
+import pickle
+import sqlite3
+import hashlib
+import functools
+from functools import cached_property
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# torch・transformers・easyocr・ultralytics・cv2等の重いライブラリは
+# 使用する箇所で遅延importする（モジュールのimport自体を軽く保つため）
+
+# 複数キーワード照合用のAho-Corasick実装（未インストール時は逐次照合にフォールバック）
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# 高速な編集距離ライブラリ（未インストール時は標準ライブラリのdifflibで計算）
+try:
+    from rapidfuzz import fuzz
+except ImportError:
+    fuzz = None
+
+# JITコンパイラ（未インストール時はNumPyのブロードキャストで計算）
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# SIMD実装のベクトル距離計算ライブラリ（未インストール時はNumPyで計算）
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
+# 近似最近傍探索ライブラリ（faissを優先し、なければhnswlib、どちらもなければ全件走査にフォールバック）
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
 
 # ログ設定
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 文埋め込みモデルとベクトルの次元数
+SENTENCE_MODEL_NAME = 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2'
+VECTOR_DIM = 384
+
+# HNSWインデックスを構築する最小アイテム数（これ未満は全件走査の方が速い）
+HNSW_MIN_ITEMS = 1000
+
+# キャッシュするOCR結果数
+OCR_CACHE_SIZE = 256
+
+# 類似度計算で再利用するアイテムの正規化済みベクトルの最大件数（384次元のfloat32で約25MB）
+ITEM_VECTOR_CACHE_SIZE = 16384
+
+# テキストのベクトルキャッシュ（メモリ上の最大件数。起動をまたいでファイルにも保存する）
+VECTOR_DISK_CACHE_PATH = 'data/vec_cache.pkl'
+VECTOR_DISK_CACHE_SIZE = 16384
+
+# 起動をまたいで保持するOCR結果キャッシュ（画像内容のハッシュ → 抽出テキスト）
+OCR_DISK_CACHE_PATH = 'data/ocr_cache.sqlite3'
+
+# セマンティック検索対象のベクトル行列（int8量子化済み）とアイテムIDの保存先
+CORPUS_MATRIX_PATH = 'data/corpus.npy'
+CORPUS_IDS_PATH = 'data/corpus_ids.json'
+
+# int8量子化の倍率（L2正規化済みベクトルの各要素は[-1, 1]に収まる）
+QUANT_SCALE = 127
+
+# 拾得物として適切な物品のYOLO（COCO）クラスID
+RELEVANT_CLASS_IDS = frozenset({
+    67,  # cell phone
+    63,  # laptop
+    64,  # mouse
+    66,  # keyboard
+    65,  # remote
+    62,  # tv
+    26,  # handbag
+    24,  # backpack
+    28,  # suitcase
+    25,  # umbrella
+    73,  # book
+    74,  # clock
+    39,  # bottle
+    41,  # cup
+    40,  # wine glass
+    45,  # bowl
+    27,  # tie
+    32,  # sports ball
+    29,  # frisbee
+    30,  # skis
+    31,  # snowboard
+    36,  # skateboard
+    37,  # surfboard
+    38,  # tennis racket
+    34,  # baseball bat
+    35,  # baseball glove
+    46,  # banana
+    47,  # apple
+    48,  # sandwich
+    49,  # orange
+    50,  # broccoli
+    51,  # carrot
+    52,  # hot dog
+    53,  # pizza
+    54,  # donut
+    55,  # cake
+    76,  # scissors
+    77,  # teddy bear
+    78,  # hair drier
+    79,  # toothbrush
+    75,  # vase
+    1,   # bicycle
+})
+
+# YOLO COCOデータセットのクラス名（拾得物として適切な物品を優先）
+COCO_CLASSES = {
+    # 携帯電話・電子機器類（優先度高）
+    67: "cell phone",  # 携帯電話
+    63: "laptop",      # ノートパソコン
+    64: "mouse",       # マウス
+    66: "keyboard",    # キーボード
+    65: "remote",      # リモコン
+    62: "tv",          # テレビ
+    
+    # かばん・バッグ類（優先度高）
+    26: "handbag",     # ハンドバッグ
+    24: "backpack",    # リュックサック
+    28: "suitcase",    # スーツケース
+    
+    # 傘類（優先度高）
+    25: "umbrella",    # 傘
+    
+    # 本・書類類（優先度中）
+    73: "book",        # 本
+    
+    # 時計類（優先度中）
+    74: "clock",       # 時計
+    
+    # 食器・容器類（優先度中）
+    39: "bottle",      # ボトル
+    41: "cup",         # カップ
+    40: "wine glass",  # ワイングラス
+    45: "bowl",        # ボウル
+    
+    # 衣類・アクセサリー類（優先度中）
+    27: "tie",         # ネクタイ
+    
+    # スポーツ用品類（優先度低）
+    32: "sports ball", # スポーツボール
+    29: "frisbee",     # フリスビー
+    30: "skis",        # スキー
+    31: "snowboard",   # スノーボード
+    36: "skateboard",  # スケートボード
+    37: "surfboard",   # サーフボード
+    38: "tennis racket", # テニスラケット
+    34: "baseball bat", # 野球バット
+    35: "baseball glove", # 野球グローブ
+    
+    # 楽器類（優先度低）
+    # 楽器はCOCOデータセットに含まれていないため、別途対応が必要
+    
+    # 食品類（優先度低）
+    46: "banana",      # バナナ
+    47: "apple",       # りんご
+    48: "sandwich",    # サンドイッチ
+    49: "orange",      # オレンジ
+    50: "broccoli",    # ブロッコリー
+    51: "carrot",      # にんじん
+    52: "hot dog",     # ホットドッグ
+    53: "pizza",       # ピザ
+    54: "donut",       # ドーナツ
+    55: "cake",        # ケーキ
+    
+    # 家具類（優先度低）
+    56: "chair",       # 椅子
+    57: "couch",       # ソファ
+    58: "potted plant", # 鉢植え
+    59: "bed",         # ベッド
+    60: "dining table", # テーブル
+    75: "vase",        # 花瓶
+    
+    # 家電・設備類（優先度低）
+    68: "microwave",   # 電子レンジ
+    69: "oven",        # オーブン
+    70: "toaster",     # トースター
+    71: "sink",        # シンク
+    72: "refrigerator", # 冷蔵庫
+    78: "hair drier",  # ヘアドライヤー
+    79: "toothbrush",  # 歯ブラシ
+    
+    # 工具・文具類（優先度低）
+    76: "scissors",    # ハサミ
+    
+    # 生物・人物類（優先度最低）
+    0: "person",       # 人物
+    14: "bird",        # 鳥
+    15: "cat",         # 猫
+    16: "dog",         # 犬
+    17: "horse",       # 馬
+    18: "sheep",       # 羊
+    19: "cow",         # 牛
+    20: "elephant",    # 象
+    21: "bear",        # 熊
+    22: "zebra",       # シマウマ
+    23: "giraffe",     # キリン
+    77: "teddy bear",  # テディベア
+    
+    # 乗り物類（優先度最低）
+    1: "bicycle",      # 自転車
+    2: "car",          # 車
+    3: "motorcycle",   # バイク
+    4: "airplane",     # 飛行機
+    5: "bus",          # バス
+    6: "train",        # 電車
+    7: "truck",        # トラック
+    8: "boat",         # ボート
+    
+    # 道路・交通関連（優先度最低）
+    9: "traffic light", # 信号機
+    10: "fire hydrant", # 消火栓
+    11: "stop sign",   # 停止標識
+    12: "parking meter", # パーキングメーター
+    13: "bench",       # ベンチ
+    61: "toilet",      # トイレ
+}
+
+# YOLOクラス名と分類のマッピング（item_classification.jsonに基づく）
+OBJECT_TO_CATEGORY = {
+    # 携帯電話類（優先度最高）
+    "cell phone": {"large": "携帯電話類", "medium": "携帯電話機", "name": "スマートフォン"},
+    
+    # 電気製品類
+    "laptop": {"large": "電気製品類", "medium": "電子機器", "name": "ノートパソコン"},
+    "keyboard": {"large": "電気製品類", "medium": "電子機器", "name": "キーボード"},
+    "mouse": {"large": "電気製品類", "medium": "電子機器", "name": "マウス"},
+    "remote": {"large": "電気製品類", "medium": "その他電気製品", "name": "リモコン"},
+    "tv": {"large": "電気製品類", "medium": "その他電気製品", "name": "テレビ"},
+    "hair drier": {"large": "電気製品類", "medium": "その他電気製品", "name": "ヘアドライヤー"},
+    "toothbrush": {"large": "生活用品類", "medium": "生活用品", "name": "歯ブラシ"},
+    
+    # かばん類
+    "handbag": {"large": "かばん類", "medium": "手提げかばん", "name": "ハンドバッグ"},
+    "backpack": {"large": "かばん類", "medium": "肩掛けかばん", "name": "リュックサック"},
+    "suitcase": {"large": "かばん類", "medium": "その他かばん類", "name": "スーツケース"},
+    
+    # 傘類
+    "umbrella": {"large": "かさ類", "medium": "かさ", "name": "傘"},
+    
+    # 時計類
+    "clock": {"large": "時計類", "medium": "その他時計類", "name": "時計"},
+    
+    # 著作品類
+    "book": {"large": "著作品類", "medium": "書籍類", "name": "本"},
+    
+    # 食器・容器類
+    "bottle": {"large": "生活用品類", "medium": "食器類", "name": "ボトル"},
+    "cup": {"large": "生活用品類", "medium": "食器類", "name": "カップ"},
+    "wine glass": {"large": "生活用品類", "medium": "食器類", "name": "ワイングラス"},
+    "bowl": {"large": "生活用品類", "medium": "食器類", "name": "ボウル"},
+    
+    # 衣類・アクセサリー類
+    "tie": {"large": "衣類・履物類", "medium": "その他衣類", "name": "ネクタイ"},
+    
+    # スポーツ用品類
+    "sports ball": {"large": "趣味・娯楽用品類", "medium": "レジャー・スポーツ用品", "name": "スポーツボール"},
+    "frisbee": {"large": "趣味・娯楽用品類", "medium": "レジャー・スポーツ用品", "name": "フリスビー"},
+    "skis": {"large": "趣味・娯楽用品類", "medium": "レジャー・スポーツ用品", "name": "スキー"},
+    "snowboard": {"large": "趣味・娯楽用品類", "medium": "レジャー・スポーツ用品", "name": "スノーボード"},
+    "skateboard": {"large": "趣味・娯楽用品類", "medium": "レジャー・スポーツ用品", "name": "スケートボード"},
+    "surfboard": {"large": "趣味・娯楽用品類", "medium": "レジャー・スポーツ用品", "name": "サーフボード"},
+    "tennis racket": {"large": "趣味・娯楽用品類", "medium": "レジャー・スポーツ用品", "name": "テニスラケット"},
+    "baseball bat": {"large": "趣味・娯楽用品類", "medium": "レジャー・スポーツ用品", "name": "野球バット"},
+    "baseball glove": {"large": "趣味・娯楽用品類", "medium": "レジャー・スポーツ用品", "name": "野球グローブ"},
+    
+    # 食品類
+    "banana": {"large": "食料品類", "medium": "食料品類", "name": "バナナ"},
+    "apple": {"large": "食料品類", "medium": "食料品類", "name": "りんご"},
+    "sandwich": {"large": "食料品類", "medium": "食料品類", "name": "サンドイッチ"},
+    "orange": {"large": "食料品類", "medium": "食料品類", "name": "オレンジ"},
+    "broccoli": {"large": "食料品類", "medium": "食料品類", "name": "ブロッコリー"},
+    "carrot": {"large": "食料品類", "medium": "食料品類", "name": "にんじん"},
+    "hot dog": {"large": "食料品類", "medium": "食料品類", "name": "ホットドッグ"},
+    "pizza": {"large": "食料品類", "medium": "食料品類", "name": "ピザ"},
+    "donut": {"large": "食料品類", "medium": "食料品類", "name": "ドーナツ"},
+    "cake": {"large": "食料品類", "medium": "食料品類", "name": "ケーキ"},
+    
+    # 生活用品類
+    "scissors": {"large": "生活用品類", "medium": "工具類", "name": "ハサミ"},
+    "vase": {"large": "生活用品類", "medium": "生活用品", "name": "花瓶"},
+    
+    # 趣味・娯楽用品類
+    "teddy bear": {"large": "趣味・娯楽用品類", "medium": "その他趣味・娯楽用品類", "name": "ぬいぐるみ"},
+    
+    # 動植物類（優先度低）
+    "person": {"large": "その他", "medium": "その他", "name": "人物"},
+    "bird": {"large": "動植物類", "medium": "動物", "name": "鳥"},
+    "cat": {"large": "動植物類", "medium": "動物", "name": "猫"},
+    "dog": {"large": "動植物類", "medium": "動物", "name": "犬"},
+    "horse": {"large": "動植物類", "medium": "動物", "name": "馬"},
+    "sheep": {"large": "動植物類", "medium": "動物", "name": "羊"},
+    "cow": {"large": "動植物類", "medium": "動物", "name": "牛"},
+    "elephant": {"large": "動植物類", "medium": "動物", "name": "象"},
+    "bear": {"large": "動植物類", "medium": "動物", "name": "熊"},
+    "zebra": {"large": "動植物類", "medium": "動物", "name": "シマウマ"},
+    "giraffe": {"large": "動植物類", "medium": "動物", "name": "キリン"},
+    "potted plant": {"large": "動植物類", "medium": "植物", "name": "鉢植え"},
+    
+    # 乗り物類（優先度最低）
+    "bicycle": {"large": "生活用品類", "medium": "自転車類", "name": "自転車"},
+    "car": {"large": "その他", "medium": "その他", "name": "車"},
+    "motorcycle": {"large": "その他", "medium": "その他", "name": "バイク"},
+    "airplane": {"large": "その他", "medium": "その他", "name": "飛行機"},
+    "bus": {"large": "その他", "medium": "その他", "name": "バス"},
+    "train": {"large": "その他", "medium": "その他", "name": "電車"},
+    "truck": {"large": "その他", "medium": "その他", "name": "トラック"},
+    "boat": {"large": "その他", "medium": "その他", "name": "ボート"},
+    
+    # 家具・設備類（優先度最低）
+    "chair": {"large": "その他", "medium": "その他", "name": "椅子"},
+    "couch": {"large": "その他", "medium": "その他", "name": "ソファ"},
+    "bed": {"large": "その他", "medium": "その他", "name": "ベッド"},
+    "dining table": {"large": "その他", "medium": "その他", "name": "テーブル"},
+    "microwave": {"large": "その他", "medium": "その他", "name": "電子レンジ"},
+    "oven": {"large": "その他", "medium": "その他", "name": "オーブン"},
+    "toaster": {"large": "その他", "medium": "その他", "name": "トースター"},
+    "sink": {"large": "その他", "medium": "その他", "name": "シンク"},
+    "refrigerator": {"large": "その他", "medium": "その他", "name": "冷蔵庫"},
+    "toilet": {"large": "その他", "medium": "その他", "name": "トイレ"},
+    
+    # 道路・交通関連（優先度最低）
+    "traffic light": {"large": "その他", "medium": "その他", "name": "信号機"},
+    "fire hydrant": {"large": "その他", "medium": "その他", "name": "消火栓"},
+    "stop sign": {"large": "その他", "medium": "その他", "name": "停止標識"},
+    "parking meter": {"large": "その他", "medium": "その他", "name": "パーキングメーター"},
+    "bench": {"large": "その他", "medium": "その他", "name": "ベンチ"},
+}
+
+# 拾得物として適切な物品（物体検出による分類で優先する）
+PRIORITY_OBJECT_NAMES = frozenset({
+    "cell phone", "laptop", "handbag", "backpack", "suitcase", "umbrella",
+    "book", "clock", "bottle", "cup", "tie", "scissors", "teddy bear"
+})
+
+# 物体検出で採用する最小信頼度
+DETECTION_CONF_THRESHOLD = 0.3
+
+# 品名から抽出する属性（材質・色・サイズ）のキーワード → 特徴名
+# 属性ごとに、品名に含まれるキーワードのうち定義順で最初のものを採用する
+NAME_FEATURE_KEYWORDS = (
+    {
+        "革": "革製", "皮": "革製", "leather": "革製",
+        "布": "布製", "綿": "布製", "cotton": "布製",
+        "金属": "金属製", "金": "金属製", "銀": "金属製", "metal": "金属製",
+        "プラスチック": "プラスチック製", "plastic": "プラスチック製",
+        "木": "木製", "wood": "木製", "竹": "竹製"
+    },
+    {
+        "黒": "黒色", "白": "白色", "赤": "赤色", "青": "青色", "緑": "緑色",
+        "黄": "黄色", "紫": "紫色", "ピンク": "ピンク色", "オレンジ": "オレンジ色",
+        "茶": "茶色", "グレー": "グレー色", "金": "金色", "銀": "銀色",
+        "black": "黒色", "white": "白色", "red": "赤色", "blue": "青色"
+    },
+    {
+        "小": "小型", "大": "大型", "中": "中型",
+        "mini": "小型", "large": "大型", "small": "小型"
+    },
+)
+
+# 全属性のキーワードを定義順に並べた一覧 (属性番号, キーワード, 特徴名)
+NAME_FEATURE_ENTRIES = tuple(
+    (category_index, keyword, feature)
+    for category_index, keywords in enumerate(NAME_FEATURE_KEYWORDS)
+    for keyword, feature in keywords.items()
+)
+
+# 品名の長さによる特徴（5文字以下・10文字以下・それより長い）
+NAME_LENGTH_FEATURES = ("短い品名", "中程度の品名", "長い品名")
+
+# 色名マッピング（RGB値 → 色名）
+COLOR_MAP = {
+    (255, 0, 0): "赤", (200, 0, 0): "赤", (150, 0, 0): "赤",
+    (0, 255, 0): "緑", (0, 200, 0): "緑", (0, 150, 0): "緑",
+    (0, 0, 255): "青", (0, 0, 200): "青", (0, 0, 150): "青",
+    (255, 255, 0): "黄", (200, 200, 0): "黄", (150, 150, 0): "黄",
+    (255, 0, 255): "マゼンタ", (200, 0, 200): "マゼンタ", (150, 0, 150): "マゼンタ",
+    (0, 255, 255): "シアン", (0, 200, 200): "シアン", (0, 150, 150): "シアン",
+    (255, 255, 255): "白", (240, 240, 240): "白", (220, 220, 220): "白",
+    (0, 0, 0): "黒", (20, 20, 20): "黒", (40, 40, 40): "黒",
+    (128, 128, 128): "グレー", (100, 100, 100): "グレー", (150, 150, 150): "グレー",
+    (255, 165, 0): "オレンジ", (255, 140, 0): "オレンジ", (255, 120, 0): "オレンジ",
+    (128, 0, 128): "紫", (100, 0, 100): "紫", (150, 0, 150): "紫",
+    (165, 42, 42): "茶", (139, 69, 19): "茶", (160, 82, 45): "茶",
+    (255, 192, 203): "ピンク", (255, 182, 193): "ピンク", (255, 172, 183): "ピンク",
+    (255, 215, 0): "金", (255, 223, 0): "金", (255, 235, 0): "金",
+    (192, 192, 192): "銀", (169, 169, 169): "銀", (211, 211, 211): "銀",
+}
+
+
+def _nearest_palette_kernel(colors, palette):
+    """各色について最も近いパレット色の番号を計算（二乗距離、中間配列なし。numbaでコンパイルして使用）"""
+    nearest = np.empty(colors.shape[0], dtype=np.int64)
+    for i in range(colors.shape[0]):
+        r, g, b = colors[i, 0], colors[i, 1], colors[i, 2]
+        best_index = 0
+        best_distance = 1 << 30
+        for j in range(palette.shape[0]):
+            dr = r - palette[j, 0]
+            dg = g - palette[j, 1]
+            db = b - palette[j, 2]
+            distance = dr * dr + dg * dg + db * db
+            if distance < best_distance:
+                best_distance = distance
+                best_index = j
+        nearest[i] = best_index
+    return nearest
+
+
+def _cosine_similarity_kernel(u, v):
+    """内積と両ベクトルのノルムを1回の走査で計算してコサイン類似度を返す（numbaでコンパイルして使用）"""
+    dot = 0.0
+    u_norm = 0.0
+    v_norm = 0.0
+    for k in range(u.shape[0]):
+        a = u[k]
+        b = v[k]
+        dot += a * b
+        u_norm += a * a
+        v_norm += b * b
+    if u_norm == 0.0 or v_norm == 0.0:
+        return 0.0
+    return dot / (np.sqrt(u_norm) * np.sqrt(v_norm))
+
+
+def _compile_numba(kernel, **options):
+    """numbaで関数をコンパイル（numba未インストール時はNone）"""
+    if njit is None:
+        return None
+    try:
+        return njit(cache=True, **options)(kernel)
+    except Exception:
+        # パッケージ化された環境等でキャッシュ先が使えない場合はキャッシュなしでコンパイル
+        return njit(**options)(kernel)
+
+
+_nearest_palette_numba = _compile_numba(_nearest_palette_kernel)
+_cosine_similarity_numba = _compile_numba(_cosine_similarity_kernel, fastmath=True)
+
+
+# 分類キーワード照合用の正規化で使う変換表（1文字の削除はstr.translateで1回の走査にまとめる）
+_LONG_VOWEL_TABLE = str.maketrans("", "", "ー")
+_SOUND_MARK_TABLE = str.maketrans("", "", "゛゜")
+_VU_PATTERN = re.compile("ヴ([ァィェォ])")
+_VU_REPLACEMENTS = {"ァ": "バ", "ィ": "ビ", "ェ": "ベ", "ォ": "ボ"}
+
+
+def _replace_vu(match) -> str:
+    return _VU_REPLACEMENTS[match.group(1)]
+
+
+@functools.lru_cache(maxsize=8192)
+def _normalize_classification_text(text: str) -> str:
+    """分類キーワード照合用にテキストを正規化（同じ入力は繰り返し現れるため結果をキャッシュ）"""
+    if not text:
+        return ""
+    # 1. 全角英数字記号を半角に
+    text = mojimoji.zen_to_han(text, kana=False)
+    
+    #2文字に統一
+    text = text.lower()
+    
+    # 3. カタカナの長音を削除
+    text = text.translate(_LONG_VOWEL_TABLE)
+    
+    # 4. その他の正規化ルール
+    # ヴァ行の表記統一
+    text = _VU_PATTERN.sub(_replace_vu, text)
+    
+    # 濁点・半濁点の正規化（簡易的）
+    text = text.translate(_SOUND_MARK_TABLE)
+    
+    # 空白文字の正規化
+    text = " ".join(text.split())
+    
+    return text
+
+
+def _configure_torch() -> None:
+    """Ampere以降のGPUでTensor Core（TF32）による行列演算を許可し、cuDNNに最速アルゴリズムを選ばせる。
+    CPUの演算スレッド数も環境変数 TORCH_NUM_THREADS（未指定時はコア数の半分をワーカー数で割った値）で設定する"""
+    import torch
+    torch.set_float32_matmul_precision('high')
+    torch.backends.cuda.matmul.allow_tf32 = True
+    torch.backends.cudnn.allow_tf32 = True
+    torch.backends.cudnn.benchmark = True
+    # OCR・物体検出・色解析を並列実行するため、演算スレッドはコア数の半分に抑えて過剰なスレッド競合を防ぐ
+    # 複数ワーカー（WEB_CONCURRENCY）で起動する場合はワーカー単位で並列化されるため、さらにワーカー数で割る
+    workers = max(1, int(os.environ.get("WEB_CONCURRENCY", "1") or 1))
+    num_threads = int(os.environ.get("TORCH_NUM_THREADS", "0")) or max(1, (os.cpu_count() or 2) // 2 // workers)
+    torch.set_num_threads(num_threads)
+    try:
+        # 演算子間の並列実行は使わないため1スレッドに固定（並列処理の開始後は変更できない）
+        torch.set_num_interop_threads(1)
+    except RuntimeError as e:
+        logger.warning(f"PyTorchの演算子間スレッド数を設定できませんでした: {e}")
+
+
+class _OnnxCraftDetector:
+    """EasyOCRの検出器（CRAFT）と同じ呼び出し方でONNX Runtimeを実行するラッパー"""
+    
+    def __init__(self, session):
+        self.session = session
+        self.input_name = session.get_inputs()[0].name
+    
+    def __call__(self, x):
+        import torch
+        y, feature = self.session.run(None, {self.input_name: x.detach().cpu().numpy()})
+        return torch.from_numpy(y), torch.from_numpy(feature)
+    
+    def eval(self):
+        return self
+
+
 class AIEngine:
     def __init__(self):
         """AIエンジンの初期化"""
+        import torch
+        from sentence_transformers import SentenceTransformer
+        from app.classification_service import SemanticClassifier
+        
+        _configure_torch()
+        
+        # 画像系モデル（YOLO・EasyOCR）は初回利用時に読み込む
+        self._model_lock = threading.RLock()
+        
         self.classification_data = self._load_classification_data()
-        self.sentence_model = SentenceTransformer('sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2')
-        self.semantic_classifier = SemanticClassifier('data/category_vectors.npz')
         
-        # EasyOCRの初期化（PIL.Image.ANTIALIASエラー回避）
+        # _classify_item用のキーワード索引
+        self._build_keyword_index()
+        # _extract_features_from_name用の属性キーワード索引
+        self._name_feature_automaton = self._build_name_feature_automaton()
+        # suggest_category_by_name用のキーワード → (大分類名, 中分類名)の逆引き辞書
+        self._term_to_category = self._build_term_to_category()
+        
+        # 色名推定用のパレット（距離計算をベクトル化するため配列で保持）
+        self._palette = np.array(list(COLOR_MAP.keys()), dtype=np.int32)
+        self._palette_names = list(COLOR_MAP.values())
+        # 色名の一覧（定義順・重複なし）と、パレット番号 → 色名番号の対応
+        self._color_names = list(dict.fromkeys(self._palette_names))
+        self._palette_name_ids = np.array(
+            [self._color_names.index(name) for name in self._palette_names], dtype=np.intp
+        )
+        if _nearest_palette_numba is not None:
+            # JITコンパイルを起動時に済ませる
+            self._nearest_palette_indices(np.zeros((1, 3), dtype=np.int32))
+        if simsimd is None and _cosine_similarity_numba is not None:
+            _cosine_similarity_numba(np.ones(1, dtype=np.float32), np.ones(1, dtype=np.float32))
+        
+        self.sentence_model = SentenceTransformer(SENTENCE_MODEL_NAME).eval()
+        if torch.cuda.is_available():
+            # GPU環境ではFP16で推論（出力はfloat32に戻して扱う）
+            try:
+                self.sentence_model = self.sentence_model.half().to('cuda')
+            except Exception as e:
+                logger.warning(f"文埋め込みモデルのFP16化に失敗: {e}")
+        self.semantic_classifier = SemanticClassifier('data/category_vectors.npy', 'data/categories.npy', 'data/category_vectors.npz')
+        
+        # 独立した推論段（YOLO・OCR）を並行実行するためのスレッドプール（シングルコア環境では逐次実行）
+        self._executor = ThreadPoolExecutor(max_workers=3) if (os.cpu_count() or 1) >= 2 else None
+        
+        # 同じテキスト・画像の再推論を避けるためのキャッシュ
+        self._vector_disk_cache = self._load_vector_cache(VECTOR_DISK_CACHE_PATH)
+        self._vector_disk_cache_lock = threading.Lock()
+        atexit.register(self.save_vector_cache, VECTOR_DISK_CACHE_PATH)
+        self._ocr_cache: "OrderedDict[bytes, str]" = OrderedDict()
+        self._ocr_cache_lock = threading.Lock()
+        # アイテムID → (バージョン, L2正規化済みベクトル)。バージョン（更新日時）が変わったものは作り直す
+        self._item_vector_cache: "OrderedDict[str, Tuple[str, np.ndarray]]" = OrderedDict()
+        self._item_vector_cache_lock = threading.Lock()
+        self._ocr_disk_cache = self._open_ocr_disk_cache(OCR_DISK_CACHE_PATH)
+        
+        # セマンティック検索用のアイテムベクトル（L2正規化後にint8量子化した行列として保持）
+        self._item_ids: List[str] = []
+        self._item_matrix = np.zeros((0, VECTOR_DIM), dtype=np.int8)
+        self._ann_index = None
+        # 保存済みの内容から変更されたか（変更がなければ終了時に保存しない）
+        self._corpus_dirty = False
+        # 検索対象の登録・追加・読み込みと、検索時の参照を直列化する
+        self._corpus_lock = threading.RLock()
+        # 保存済みの検索対象があれば読み込む（行列はメモリマップで必要な部分だけ読まれる）
+        if os.path.exists(CORPUS_MATRIX_PATH):
+            self.load_corpus()
+        # 登録・追加された検索対象は終了時に保存し、次回起動時に読み込む
+        atexit.register(self.save_corpus)
+        
+        # YOLOの推論時の設定（正規化・FP16変換はGPU上で行わせ、入力サイズはエクスポート時と揃える。
+        # 対象クラス・信頼度による絞り込みも後処理内で行わせる）
+        self._relevant_class_list = sorted(RELEVANT_CLASS_IDS)
+        # クラスIDで引く対象クラスのマスク（COCOの80クラス分）
+        self._relevant_class_mask = np.zeros(80, dtype=bool)
+        self._relevant_class_mask[self._relevant_class_list] = True
+        self._yolo_predict_args = {
+            "imgsz": 640,
+            "classes": self._relevant_class_list,
+            "conf": DETECTION_CONF_THRESHOLD,
+            "device": 0 if torch.cuda.is_available() else "cpu",
+            "half": torch.cuda.is_available(),
+            "verbose": False
+        }
+        
+        # 分類オートマトンの構築（エラーハンドリング付き）
         try:
-            # Pillowの新しいバージョンでANTIALIASが削除されたため、代替設定を使用
-            import PIL.Image
-            if not hasattr(PIL.Image, 'ANTIALIAS'):
-                # ANTIALIASが存在しない場合、LANCZOSを使用
-                PIL.Image.ANTIALIAS = PIL.Image.LANCZOS
-            
-            self.ocr_reader = easyocr.Reader(['ja', 'en'])
+            self.classification_automaton = self._build_classification_automaton()
+            logger.info(f"分類オートマトン構築完了: {len(self.classification_automaton[1])}個のキーワード")
         except Exception as e:
-            logger.warning(f"EasyOCRの初期化に失敗: {e}")
-            self.ocr_reader = None
+            logger.error(f"分類オートマトン初期化エラー: {e}")
+            # エラーが発生した場合は空のオートマトンを設定
+            self.classification_automaton = (None, [])
+        
+        # 初回推論の遅延（遅延初期化・cuDNNのアルゴリズム選択）を起動時に済ませる
+        self._warmup_model(
+            "文埋め込み", lambda: self.sentence_model.encode(["warmup"], show_progress_bar=False)
+        )
+    
+    @cached_property
+    def ocr_reader(self):
+        """EasyOCRのReader（初回利用時に読み込み、ウォームアップする。失敗時はNone）"""
+        with self._model_lock:
+            if 'ocr_reader' in self.__dict__:
+                return self.__dict__['ocr_reader']
+            
+            # EasyOCRの初期化（PIL.Image.ANTIALIASエラー回避）
+            try:
+                import easyocr
+                
+                # Pillowの新しいバージョンでANTIALIASが削除されたため、代替設定を使用
+                import PIL.Image
+                if not hasattr(PIL.Image, 'ANTIALIAS'):
+                    # ANTIALIASが存在しない場合、LANCZOSを使用
+                    PIL.Image.ANTIALIAS = PIL.Image.LANCZOS
+                
+                ocr_reader = easyocr.Reader(['ja', 'en'])
+                # テキスト領域検出（CRAFT）はONNX Runtimeで実行（利用できない場合はPyTorchのまま）
+                self._load_onnx_ocr_detector(ocr_reader, 'backend/craft_detector.onnx')
+                self._warmup_model("EasyOCR", lambda: ocr_reader.readtext(self._warmup_image()))
+            except Exception as e:
+                logger.warning(f"EasyOCRの初期化に失敗: {e}")
+                ocr_reader = None
+            
+            # 他スレッドが同時に読み込みを始めないよう、ロックを保持したまま結果を保存
+            self.__dict__['ocr_reader'] = ocr_reader
+            return ocr_reader
+    
+    @cached_property
+    def yolo_model(self):
+        """YOLOモデル（物体検出用。初回利用時に読み込み、ウォームアップする。失敗時はNone）"""
+        with self._model_lock:
+            if 'yolo_model' in self.__dict__:
+                return self.__dict__['yolo_model']
+            
+            try:
+                # backendディレクトリのyolov8n.ptを参照
+                model_path = 'backend/yolov8n.pt'
+                if os.path.exists(model_path):
+                    yolo_model = self._load_yolo_model(model_path)
+                    self._warmup_model("YOLO", lambda: yolo_model(self._warmup_image(), **self._yolo_predict_args))
+                else:
+                    logger.warning(f"YOLOモデルファイルが見つかりません: {model_path}")
+                    yolo_model = None
+            except Exception as e:
+                logger.warning(f"YOLOモデルの読み込みに失敗: {e}")
+                yolo_model = None
+            
+            self.__dict__['yolo_model'] = yolo_model
+            return yolo_model
+    
+    def _warmup_image(self) -> np.ndarray:
+        """ウォームアップ用のダミー画像"""
+        return np.zeros((640, 640, 3), dtype=np.uint8)
+    
+    def _warmup_model(self, name: str, warmup) -> None:
+        """ダミー入力でモデルを1回推論し、初回呼び出し時の遅延を解消（失敗してもログのみ）"""
+        import torch
         
-        # YOLOモデルの初期化（物体検出用）
         try:
-            # backendディレクトリのyolov8n.ptを参照
-            model_path = 'backend/yolov8n.pt'
-            if os.path.exists(model_path):
-                self.yolo_model = YOLO(model_path)
-            else:
-                logger.warning(f"YOLOモデルファイルが見つかりません: {model_path}")
-                self.yolo_model = None
+            with torch.inference_mode():
+                warmup()
         except Exception as e:
-            logger.warning(f"YOLOモデルの読み込みに失敗: {e}")
-            self.yolo_model = None
+            logger.warning(f"{name}モデルのウォームアップに失敗: {e}")
+    
+    def _load_onnx_ocr_detector(self, ocr_reader, onnx_path: str) -> None:
+        """
+        EasyOCRのテキスト領域検出器（CRAFT）をONNX Runtime版に差し替え
         
-        # 画像分類パイプライン
+        初回のみONNXへエクスポートし、以降は生成済みのファイルを再利用する。
+        onnxruntimeが未インストールの場合やエクスポートに失敗した場合は何もしない
+        
+        Args:
+            ocr_reader: EasyOCRのReader
+            onnx_path: ONNXモデルの保存先パス
+        """
         try:
-            self.image_classifier = pipeline(
-                "image-classification",
-                model="microsoft/resnet-50",
-                device=0 if torch.cuda.is_available() else -1
-            )
+            import onnxruntime as ort
+        except ImportError:
+            return
+        
+        import torch
+        
+        try:
+            if not os.path.exists(onnx_path):
+                detector = ocr_reader.detector
+                detector = getattr(detector, 'module', detector)  # DataParallelを外す
+                device = next(detector.parameters()).device
+                dummy = torch.zeros((1, 3, 640, 640), dtype=torch.float32, device=device)
+                logger.info(f"OCR検出モデルをONNXにエクスポートします: {onnx_path}")
+                torch.onnx.export(
+                    detector, dummy, onnx_path,
+                    input_names=['input'],
+                    output_names=['y', 'feature'],
+                    dynamic_axes={
+                        'input': {0: 'batch', 2: 'height', 3: 'width'},
+                        'y': {0: 'batch', 1: 'out_height', 2: 'out_width'},
+                        'feature': {0: 'batch', 2: 'out_height', 3: 'out_width'},
+                    },
+                    opset_version=17
+                )
+            
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            providers = [
+                provider for provider in ('CUDAExecutionProvider', 'CPUExecutionProvider')
+                if provider in ort.get_available_providers()
+            ]
+            session = ort.InferenceSession(onnx_path, sess_options=options, providers=providers)
+            ocr_reader.detector = _OnnxCraftDetector(session)
+            logger.info(f"OCR検出モデルをONNX Runtimeで実行します: {providers}")
         except Exception as e:
-            logger.warning(f"画像分類モデルの読み込みに失敗: {e}")
-            self.image_classifier = None
+            logger.warning(f"OCR検出モデルのONNX化に失敗したため、PyTorchモデルを使用します: {e}")
+    
+    def _load_yolo_model(self, model_path: str):
+        """
+        YOLOモデルを読み込み（TensorRTエンジン → ONNX → PyTorchモデルの順に優先）
         
-        # 分類オートマトンの構築（エラーハンドリング付き）
+        TensorRTエンジンはGPU環境でのみ使用する。環境変数YOLO_INT8_CALIB_DATAに
+        キャリブレーション用のdata yamlが指定されている場合はINT8エンジン、それ以外はFP16エンジンを使用する
+        
+        Args:
+            model_path: PyTorchモデル（.pt）のパス
+            
+        Returns:
+            YOLOモデル
+        """
+        import torch
+        from ultralytics import YOLO
+        
+        if torch.cuda.is_available():
+            engine_model = self._load_yolo_engine(model_path)
+            if engine_model is not None:
+                return engine_model
+        
+        # TensorRTが使えない環境ではONNX Runtime版を使用（onnxruntime未インストール時はPyTorchモデル）
+        onnx_path = os.path.splitext(model_path)[0] + '.onnx'
         try:
-            self.classification_automaton = self._build_classification_automaton()
-            logger.info(f"分類オートマトン構築完了: {len(self.classification_automaton[1])}個のキーワード")
+            import onnxruntime  # noqa: F401
+            if not os.path.exists(onnx_path):
+                # 初回のみエクスポートし、以降は生成済みのモデルを再利用
+                logger.info(f"ONNXモデルをエクスポートします: {onnx_path}")
+                YOLO(model_path).export(format='onnx', dynamic=True, imgsz=640)
+            return YOLO(onnx_path, task='detect')
         except Exception as e:
-            logger.error(f"分類オートマトン初期化エラー: {e}")
-            # エラーが発生した場合は空のオートマトンを設定
-            self.classification_automaton = (re.compile(""), [])
+            logger.warning(f"ONNXモデルを使用できないため、PyTorchモデルを使用します: {e}")
+            return YOLO(model_path)
+    
+    def _load_yolo_engine(self, model_path: str):
+        """
+        YOLOのTensorRTエンジンを読み込み（未生成の場合はエクスポート）
+        
+        Args:
+            model_path: PyTorchモデル（.pt）のパス
+            
+        Returns:
+            YOLOモデル（読み込めない場合はNone）
+        """
+        from ultralytics import YOLO
+        
+        # キャリブレーション用データセット（YOLOのdata yaml）が指定されていればINT8エンジンを優先
+        calib_data = os.getenv("YOLO_INT8_CALIB_DATA")
+        if calib_data:
+            int8_engine_path = os.path.splitext(model_path)[0] + '_int8.engine'
+            try:
+                if not os.path.exists(int8_engine_path):
+                    logger.info(f"INT8 TensorRTエンジンをエクスポートします: {int8_engine_path}")
+                    exported_path = YOLO(model_path).export(
+                        format='engine', int8=True, data=calib_data, dynamic=True, batch=8, imgsz=640
+                    )
+                    # 既定の出力名はFP16エンジンと同じため、別名で保存する
+                    os.replace(exported_path, int8_engine_path)
+                return YOLO(int8_engine_path, task='detect')
+            except Exception as e:
+                logger.warning(f"INT8 TensorRTエンジンの読み込みに失敗したため、FP16エンジンを使用します: {e}")
+        
+        engine_path = os.path.splitext(model_path)[0] + '.engine'
+        try:
+            if not os.path.exists(engine_path):
+                # 初回のみエクスポートし、以降は生成済みのエンジンを再利用
+                logger.info(f"TensorRTエンジンをエクスポートします: {engine_path}")
+                YOLO(model_path).export(format='engine', half=True, dynamic=True, batch=8, imgsz=640)
+            return YOLO(engine_path, task='detect')
+        except Exception as e:
+            logger.warning(f"TensorRTエンジンの読み込みに失敗したため、ONNXモデルを試します: {e}")
+            return None
     
     def _load_classification_data(self) -> Dict:
         """分類定義ファイルを読み込み"""
@@ -113,19 +871,110 @@ class AIEngine:
         Returns:
             認識結果の辞書
         """
-        try:
-            # 画像の読み込み
-            image = Image.open(image_path)
-            
-            # 1. 物体検出（YOLO）
-            detected_objects = self._detect_objects(image)
-            
-            # 2. OCR（テキスト抽出）
-            extracted_text = self._extract_text(image_path)
+        return self.recognize_items([image_path])[0]
+    
+    def recognize_items(self, image_paths: List[str], batch_size: int = 8) -> List[Dict]:
+        """
+        複数の画像をまとめて認識し、分類を提案（YOLO・OCRをバッチ実行）
+        
+        Args:
+            image_paths: 画像ファイルのパスのリスト
+            batch_size: 1回の推論でまとめて処理する画像数
             
-            # 3. 色分析（物体領域に限定）
-            dominant_colors = self._analyze_colors(image, detected_objects)
+        Returns:
+            認識結果の辞書のリスト（image_pathsと同じ順序）
+        """
+        results = []
+        for start in range(0, len(image_paths), batch_size):
+            results.extend(self._recognize_batch(image_paths[start:start + batch_size], batch_size))
+        return results
+    
+    def _recognize_batch(self, image_paths: List[str], batch_size: int) -> List[Dict]:
+        """1バッチ分の画像を認識"""
+        # 画像の読み込み（1枚につき1回だけデコードし、YOLO・OCR・色分析で共有する）
+        with ThreadPoolExecutor(max_workers=len(image_paths)) as executor:
+            decoded_images = list(executor.map(self._decode_image, image_paths))
+        
+        results = [self._get_fallback_result() for _ in image_paths]
+        valid_indices = [i for i, decoded in enumerate(decoded_images) if decoded is not None]
+        if not valid_indices:
+            return results
+        
+        bgr_images = [decoded_images[i][0] for i in valid_indices]
+        rgb_images = [decoded_images[i][1] for i in valid_indices]
+        
+        try:
+            if self._executor is not None:
+                # OCRは物体検出と独立しているため先に別スレッドで開始（推論中はGILが解放される）
+                ocr_future = self._executor.submit(self._extract_texts, rgb_images, batch_size)
+                
+                # 1. 物体検出（YOLO、バッチ推論）
+                detected_objects_list = self._detect_objects_batch(bgr_images, batch_size)
+                
+                # 3. 色分析は検出結果が出た時点で開始し、OCRの完了待ちと重ねる
+                color_futures = [
+                    self._executor.submit(self._analyze_colors, rgb_image, detected_objects)
+                    for rgb_image, detected_objects in zip(rgb_images, detected_objects_list)
+                ]
+                
+                # 2. OCR（テキスト抽出、バッチ推論）
+                extracted_texts = ocr_future.result()
+                dominant_colors_list = [future.result() for future in color_futures]
+            else:
+                # 1. 物体検出（YOLO、バッチ推論）
+                detected_objects_list = self._detect_objects_batch(bgr_images, batch_size)
+                
+                # 2. OCR（テキスト抽出、バッチ推論）
+                extracted_texts = self._extract_texts(rgb_images, batch_size)
+                
+                # 3. 色分析（物体領域に限定）
+                dominant_colors_list = [
+                    self._analyze_colors(rgb_image, detected_objects)
+                    for rgb_image, detected_objects in zip(rgb_images, detected_objects_list)
+                ]
+        except Exception as e:
+            logger.error(f"画像認識エラー: {e}")
+            return results
+        
+        for i, rgb_image, detected_objects, extracted_text, dominant_colors in zip(
+            valid_indices, rgb_images, detected_objects_list, extracted_texts, dominant_colors_list
+        ):
+            results[i] = self._build_recognition_result(rgb_image, detected_objects, extracted_text, dominant_colors)
+        return results
+    
+    def _decode_image(self, image_path: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        画像をデコード
+        
+        Args:
+            image_path: 画像ファイルのパス
             
+        Returns:
+            (BGR配列, RGB配列)。読み込みに失敗した場合はNone
+        """
+        import cv2
+        
+        try:
+            image_bgr = cv2.imread(image_path, cv2.IMREAD_COLOR)
+            if image_bgr is None:
+                # OpenCVが対応していない形式（GIF等）はPILで読み込む
+                with Image.open(image_path) as image:
+                    image_rgb = np.asarray(image.convert("RGB"))
+                return cv2.cvtColor(image_rgb, cv2.COLOR_RGB2BGR), image_rgb
+            return image_bgr, cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
+        except Exception as e:
+            logger.error(f"画像読み込みエラー: {e}")
+            return None
+    
+    def _build_recognition_result(
+        self,
+        image: np.ndarray,
+        detected_objects: List[Dict],
+        extracted_text: str,
+        dominant_colors: List[str]
+    ) -> Dict:
+        """検出・OCR・色分析の結果から1画像分の認識結果を組み立て"""
+        try:
             # 4. 特徴抽出
             features = self._extract_features(image, detected_objects, extracted_text)
             
@@ -148,216 +997,167 @@ class AIEngine:
             logger.error(f"画像認識エラー: {e}")
             return self._get_fallback_result()
     
-    def _detect_objects(self, image: Image.Image) -> List[Dict]:
-        """YOLOを使用した物体検出"""
+    def _detect_objects(self, image: np.ndarray) -> List[Dict]:
+        """YOLOを使用した物体検出（BGR配列を入力）"""
+        return self._detect_objects_batch([image])[0]
+    
+    def _detect_objects_batch(self, images: List[np.ndarray], batch_size: int = 8) -> List[List[Dict]]:
+        """YOLOを使用した物体検出（複数画像を1回の推論で処理）"""
         if not self.yolo_model:
-            return []
+            return [[] for _ in images]
+        
+        import torch
         
         try:
-            results = self.yolo_model(image)
-            detected_objects = []
-            
-            # 拾得物として適切な物品のクラスID
-            relevant_class_ids = {
-                67,  # cell phone
-                63,  # laptop
-                64,  # mouse
-                66,  # keyboard
-                65,  # remote
-                62,  # tv
-                26,  # handbag
-                24,  # backpack
-                28,  # suitcase
-                25,  # umbrella
-                73,  # book
-                74,  # clock
-                39,  # bottle
-                41,  # cup
-                40,  # wine glass
-                45,  # bowl
-                27,  # tie
-                32,  # sports ball
-                29,  # frisbee
-                30,  # skis
-                31,  # snowboard
-                36,  # skateboard
-                37,  # surfboard
-                38,  # tennis racket
-                34,  # baseball bat
-                35,  # baseball glove
-                46,  # banana
-                47,  # apple
-                48,  # sandwich
-                49,  # orange
-                50,  # broccoli
-                51,  # carrot
-                52,  # hot dog
-                53,  # pizza
-                54,  # donut
-                55,  # cake
-                76,  # scissors
-                77,  # teddy bear
-                78,  # hair drier
-                79,  # toothbrush
-                75,  # vase
-                1,   # bicycle
-            }
-            
-            for result in results:
-                boxes = result.boxes
-                if boxes is not None:
-                    for box in boxes:
-                        class_id = int(box.cls[0])
-                        confidence = float(box.conf[0])
-                        bbox = box.xyxy[0].tolist()
-                        
-                        # 信頼度が0.3以上で、拾得物として適切な物品のみを検出
-                        if confidence >= 0.3 and class_id in relevant_class_ids:
-                            # YOLOのクラス名を取得
-                            class_name = self._get_yolo_class_name(class_id)
-                            
-                            detected_objects.append({
-                                "class_id": class_id,
-                                "class_name": class_name,
-                                "confidence": confidence,
-                                "bbox": bbox
-                            })
-            
-            return detected_objects
+            with torch.inference_mode():
+                results = self.yolo_model(images, batch=batch_size, **self._yolo_predict_args)
+            return [self._parse_detections(result) for result in results]
         except Exception as e:
             logger.warning(f"物体検出エラー: {e}")
+            return [[] for _ in images]
+    
+    def _parse_detections(self, result) -> List[Dict]:
+        """YOLOの推論結果1件から拾得物として適切な検出物体を抽出"""
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
             return []
+        
+        # 検出結果全体（x1, y1, x2, y2, [track_id,] conf, cls）を1回だけCPUに転送し、NumPy配列のまま絞り込む
+        data = boxes.data.cpu().numpy()
+        class_ids = data[:, -1].astype(np.int64)
+        confidences = data[:, -2]
+        bboxes = data[:, :4]
+        
+        # 信頼度が0.3以上で、拾得物として適切な物品のみを検出（推論時にも絞り込み済み）
+        known = (class_ids >= 0) & (class_ids < len(self._relevant_class_mask))
+        keep = known & (confidences >= DETECTION_CONF_THRESHOLD)
+        keep[known] &= self._relevant_class_mask[class_ids[known]]
+        
+        return [
+            {
+                "class_id": class_id,
+                "class_name": self._get_yolo_class_name(class_id),
+                "confidence": confidence,
+                "bbox": bbox
+            }
+            for class_id, confidence, bbox in zip(
+                class_ids[keep].tolist(), confidences[keep].tolist(), bboxes[keep].tolist()
+            )
+        ]
     
     def _get_yolo_class_name(self, class_id: int) -> str:
         """YOLOのクラスIDからクラス名を取得"""
-        # YOLO COCOデータセットのクラス名（拾得物として適切な物品を優先）
-        coco_classes = {
-            # 携帯電話・電子機器類（優先度高）
-            67: "cell phone",  # 携帯電話
-            63: "laptop",      # ノートパソコン
-            64: "mouse",       # マウス
-            66: "keyboard",    # キーボード
-            65: "remote",      # リモコン
-            62: "tv",          # テレビ
-            
-            # かばん・バッグ類（優先度高）
-            26: "handbag",     # ハンドバッグ
-            24: "backpack",    # リュックサック
-            28: "suitcase",    # スーツケース
-            
-            # 傘類（優先度高）
-            25: "umbrella",    # 傘
-            
-            # 本・書類類（優先度中）
-            73: "book",        # 本
-            
-            # 時計類（優先度中）
-            74: "clock",       # 時計
-            
-            # 食器・容器類（優先度中）
-            39: "bottle",      # ボトル
-            41: "cup",         # カップ
-            40: "wine glass",  # ワイングラス
-            45: "bowl",        # ボウル
-            
-            # 衣類・アクセサリー類（優先度中）
-            27: "tie",         # ネクタイ
-            
-            # スポーツ用品類（優先度低）
-            32: "sports ball", # スポーツボール
-            29: "frisbee",     # フリスビー
-            30: "skis",        # スキー
-            31: "snowboard",   # スノーボード
-            36: "skateboard",  # スケートボード
-            37: "surfboard",   # サーフボード
-            38: "tennis racket", # テニスラケット
-            34: "baseball bat", # 野球バット
-            35: "baseball glove", # 野球グローブ
-            
-            # 楽器類（優先度低）
-            # 楽器はCOCOデータセットに含まれていないため、別途対応が必要
-            
-            # 食品類（優先度低）
-            46: "banana",      # バナナ
-            47: "apple",       # りんご
-            48: "sandwich",    # サンドイッチ
-            49: "orange",      # オレンジ
-            50: "broccoli",    # ブロッコリー
-            51: "carrot",      # にんじん
-            52: "hot dog",     # ホットドッグ
-            53: "pizza",       # ピザ
-            54: "donut",       # ドーナツ
-            55: "cake",        # ケーキ
-            
-            # 家具類（優先度低）
-            56: "chair",       # 椅子
-            57: "couch",       # ソファ
-            58: "potted plant", # 鉢植え
-            59: "bed",         # ベッド
-            60: "dining table", # テーブル
-            75: "vase",        # 花瓶
-            
-            # 家電・設備類（優先度低）
-            68: "microwave",   # 電子レンジ
-            69: "oven",        # オーブン
-            70: "toaster",     # トースター
-            71: "sink",        # シンク
-            72: "refrigerator", # 冷蔵庫
-            78: "hair drier",  # ヘアドライヤー
-            79: "toothbrush",  # 歯ブラシ
-            
-            # 工具・文具類（優先度低）
-            76: "scissors",    # ハサミ
-            
-            # 生物・人物類（優先度最低）
-            0: "person",       # 人物
-            14: "bird",        # 鳥
-            15: "cat",         # 猫
-            16: "dog",         # 犬
-            17: "horse",       # 馬
-            18: "sheep",       # 羊
-            19: "cow",         # 牛
-            20: "elephant",    # 象
-            21: "bear",        # 熊
-            22: "zebra",       # シマウマ
-            23: "giraffe",     # キリン
-            77: "teddy bear",  # テディベア
-            
-            # 乗り物類（優先度最低）
-            1: "bicycle",      # 自転車
-            2: "car",          # 車
-            3: "motorcycle",   # バイク
-            4: "airplane",     # 飛行機
-            5: "bus",          # バス
-            6: "train",        # 電車
-            7: "truck",        # トラック
-            8: "boat",         # ボート
-            
-            # 道路・交通関連（優先度最低）
-            9: "traffic light", # 信号機
-            10: "fire hydrant", # 消火栓
-            11: "stop sign",   # 停止標識
-            12: "parking meter", # パーキングメーター
-            13: "bench",       # ベンチ
-            61: "toilet",      # トイレ
-        }
-        return coco_classes.get(class_id, f"class_{class_id}")
+        return COCO_CLASSES.get(class_id, f"class_{class_id}")
+    
+    def _extract_text(self, image: np.ndarray) -> str:
+        """OCRを使用したテキスト抽出（デコード済みのRGB配列を入力）"""
+        return self._extract_texts([image])[0]
     
-    def _extract_text(self, image_path: str) -> str:
-        """OCRを使用したテキスト抽出"""
+    def _extract_texts(self, images: List[np.ndarray], batch_size: int = 8) -> List[str]:
+        """OCRを使用したテキスト抽出（複数画像をバッチ処理、同一画像の結果はキャッシュを再利用）"""
         if not self.ocr_reader:
-            return ""
-            
+            return ["" for _ in images]
+        
+        cache_keys = [self._image_cache_key(image) for image in images]
+        with self._ocr_cache_lock:
+            texts = [self._ocr_cache.get(key) for key in cache_keys]
+            for key, text in zip(cache_keys, texts):
+                if text is not None:
+                    self._ocr_cache.move_to_end(key)
+            
+            # メモリ上にない結果はディスクキャッシュから探す
+            missing_keys = [key for key, text in zip(cache_keys, texts) if text is None]
+            if missing_keys:
+                stored_texts = self._load_ocr_disk_cache(missing_keys)
+                for i, key in enumerate(cache_keys):
+                    if texts[i] is None and key in stored_texts:
+                        texts[i] = stored_texts[key]
+                        self._ocr_cache[key] = texts[i]
+                while len(self._ocr_cache) > OCR_CACHE_SIZE:
+                    self._ocr_cache.popitem(last=False)
+        missing = [i for i, text in enumerate(texts) if text is None]
+        if not missing:
+            return texts
+        
         try:
-            results = self.ocr_reader.readtext(image_path)
-            extracted_text = " ".join([text[1] for text in results])
-            return extracted_text
+            import torch
+            with torch.inference_mode():
+                if len(missing) == 1:
+                    # 1枚だけの場合はリサイズなしの通常処理の方が精度が高い
+                    results = [self.ocr_reader.readtext(images[missing[0]])]
+                else:
+                    # バッチ処理では画像サイズを揃える必要がある
+                    results = self.ocr_reader.readtext_batched(
+                        [images[i] for i in missing], n_width=1080, n_height=1920, batch_size=batch_size
+                    )
         except Exception as e:
             logger.warning(f"OCRエラー: {e}")
-            return ""
+            return [text if text is not None else "" for text in texts]
+        
+        with self._ocr_cache_lock:
+            for i, result in zip(missing, results):
+                texts[i] = " ".join([text[1] for text in result])
+                self._ocr_cache[cache_keys[i]] = texts[i]
+                self._ocr_cache.move_to_end(cache_keys[i])
+            while len(self._ocr_cache) > OCR_CACHE_SIZE:
+                self._ocr_cache.popitem(last=False)
+            self._store_ocr_disk_cache([(cache_keys[i], texts[i]) for i in missing])
+        return texts
+    
+    def _open_ocr_disk_cache(self, cache_path: str) -> Optional[sqlite3.Connection]:
+        """
+        OCR結果のディスクキャッシュ（SQLite）を開く
+        
+        Args:
+            cache_path: キャッシュファイルのパス
+            
+        Returns:
+            SQLite接続（開けない場合はNone。その場合はメモリ上のキャッシュのみ使用）
+        """
+        try:
+            os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+            # 推論スレッドから利用するため、アクセスは_ocr_cache_lockで直列化する
+            connection = sqlite3.connect(cache_path, check_same_thread=False)
+            connection.execute("CREATE TABLE IF NOT EXISTS ocr_cache (key BLOB PRIMARY KEY, text TEXT NOT NULL)")
+            connection.commit()
+            return connection
+        except Exception as e:
+            logger.warning(f"OCRキャッシュを開けませんでした: {e}")
+            return None
+    
+    def _load_ocr_disk_cache(self, keys: List[bytes]) -> Dict[bytes, str]:
+        """ディスクキャッシュからOCR結果を取得（_ocr_cache_lockを保持した状態で呼び出す）"""
+        if self._ocr_disk_cache is None:
+            return {}
+        try:
+            placeholders = ",".join("?" * len(keys))
+            rows = self._ocr_disk_cache.execute(
+                f"SELECT key, text FROM ocr_cache WHERE key IN ({placeholders})", keys
+            ).fetchall()
+            return {bytes(key): text for key, text in rows}
+        except Exception as e:
+            logger.warning(f"OCRキャッシュの読み込みに失敗: {e}")
+            return {}
     
-    def _analyze_colors(self, image: Image.Image, detected_objects: List[Dict]) -> List[str]:
-        """画像の主要色を分析（物体領域に限定）"""
+    def _store_ocr_disk_cache(self, items: List[Tuple[bytes, str]]) -> None:
+        """OCR結果をディスクキャッシュに保存（_ocr_cache_lockを保持した状態で呼び出す）"""
+        if self._ocr_disk_cache is None:
+            return
+        try:
+            self._ocr_disk_cache.executemany("INSERT OR REPLACE INTO ocr_cache (key, text) VALUES (?, ?)", items)
+            self._ocr_disk_cache.commit()
+        except Exception as e:
+            logger.warning(f"OCRキャッシュの保存に失敗: {e}")
+    
+    def _image_cache_key(self, image: np.ndarray) -> bytes:
+        """画像の内容から128bitのキャッシュキーを計算"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(str(image.shape).encode())
+        digest.update(np.ascontiguousarray(image).data)
+        return digest.digest()
+    
+    def _analyze_colors(self, image: np.ndarray, detected_objects: List[Dict]) -> List[str]:
+        """画像の主要色を分析（物体領域に限定、RGB配列を入力）"""
         try:
             # 物体が検出された場合、物体領域の色を分析
             if detected_objects:
@@ -365,9 +1165,9 @@ class AIEngine:
                 best_object = max(detected_objects, key=lambda x: x["confidence"])
                 bbox = best_object["bbox"]
                 
-                # バウンディングボックスで画像をクロップ
+                # バウンディングボックスで画像をクロップ（コピーせずスライスで参照）
                 x1, y1, x2, y2 = map(int, bbox)
-                cropped_image = image.crop((x1, y1, x2, y2))
+                cropped_image = image[max(y1, 0):y2, max(x1, 0):x2]
                 
                 # クロップした画像の色を分析
                 return self._analyze_image_colors(cropped_image)
@@ -379,94 +1179,69 @@ class AIEngine:
             logger.warning(f"色分析エラー: {e}")
             return ["不明"]
     
-    def _analyze_image_colors(self, image: Image.Image) -> List[str]:
-        """画像の色を分析"""
+    def _analyze_image_colors(self, image: np.ndarray) -> List[str]:
+        """画像の色を分析（RGB配列を入力）"""
+        import cv2
+        
         try:
-            # 画像をリサイズして処理を高速化
-            image_small = image.resize((100, 100))
-            image_array = np.array(image_small)
-            
-            # RGB形式に変換
-            if len(image_array.shape) == 3 and image_array.shape[2] == 3:
-                colors = image_array.reshape(-1, 3)
-            else:
-                # グレースケールの場合
-                colors = np.stack([image_array.flatten()] * 3, axis=1)
-            
-            # 主要色を抽出（簡易版）
-            unique_colors, counts = np.unique(colors, axis=0, return_counts=True)
-            dominant_indices = np.argsort(counts)[-5:]  # 上位5色
-            
-            color_names = []
-            for idx in reversed(dominant_indices):
-                r, g, b = unique_colors[idx]
-                color_name = self._rgb_to_color_name(r, g, b)
-                if color_name not in color_names:  # 重複を避ける
-                    color_names.append(color_name)
-            
-            return color_names[:3]  # 上位3色のみ返す
+            # 画像を縮小して処理を高速化（面積平均で縮小し、細かな模様の色も平均に反映する）
+            small_image = cv2.resize(image, (100, 100), interpolation=cv2.INTER_AREA)
+            
+            # RGBを24bitの整数1つにパックする
+            rgb = small_image.reshape(-1, 3).astype(np.uint32)
+            keys = (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+            
+            # 出現する色ごとの画素数を1次元で集計し、実際に出現した色だけを最も近いパレット色に割り当てる
+            unique_keys, pixel_counts = np.unique(keys, return_counts=True)
+            unique_colors = np.stack([(unique_keys >> 16) & 0xFF, (unique_keys >> 8) & 0xFF, unique_keys & 0xFF], axis=1)
+            name_ids = self._palette_name_ids[self._nearest_palette_indices(unique_colors)]
+            counts = np.bincount(name_ids, weights=pixel_counts, minlength=len(self._color_names))
+            
+            # 画素数の多い順に上位3色を返す（同数の場合はパレットの定義順）
+            order = np.argsort(-counts, kind="stable")[:3]
+            return [self._color_names[i] for i in order if counts[i] > 0]
         except Exception as e:
             logger.warning(f"画像色分析エラー: {e}")
             return ["不明"]
     
     def _rgb_to_color_name(self, r: int, g: int, b: int) -> str:
         """RGB値から色名を推定"""
-        # より詳細な色名マッピング
-        color_map = {
-            (255, 0, 0): "赤", (200, 0, 0): "赤", (150, 0, 0): "赤",
-            (0, 255, 0): "緑", (0, 200, 0): "緑", (0, 150, 0): "緑",
-            (0, 0, 255): "青", (0, 0, 200): "青", (0, 0, 150): "青",
-            (255, 255, 0): "黄", (200, 200, 0): "黄", (150, 150, 0): "黄",
-            (255, 0, 255): "マゼンタ", (200, 0, 200): "マゼンタ", (150, 0, 150): "マゼンタ",
-            (0, 255, 255): "シアン", (0, 200, 200): "シアン", (0, 150, 150): "シアン",
-            (255, 255, 255): "白", (240, 240, 240): "白", (220, 220, 220): "白",
-            (0, 0, 0): "黒", (20, 20, 20): "黒", (40, 40, 40): "黒",
-            (128, 128, 128): "グレー", (100, 100, 100): "グレー", (150, 150, 150): "グレー",
-            (255, 165, 0): "オレンジ", (255, 140, 0): "オレンジ", (255, 120, 0): "オレンジ",
-            (128, 0, 128): "紫", (100, 0, 100): "紫", (150, 0, 150): "紫",
-            (165, 42, 42): "茶", (139, 69, 19): "茶", (160, 82, 45): "茶",
-            (255, 192, 203): "ピンク", (255, 182, 193): "ピンク", (255, 172, 183): "ピンク",
-            (255, 215, 0): "金", (255, 223, 0): "金", (255, 235, 0): "金",
-            (192, 192, 192): "銀", (169, 169, 169): "銀", (211, 211, 211): "銀",
-        }
-        
-        # 最も近い色を探す
-        min_distance = float('inf')
-        closest_color = "不明"
-        
-        for (cr, cg, cb), color_name in color_map.items():
-            distance = ((r - cr) ** 2 + (g - cg) ** 2 + (b - cb) ** 2) ** 0.5
-            if distance < min_distance:
-                min_distance = distance
-                closest_color = color_name
-        
-        return closest_color
+        return self._rgb_array_to_color_names(np.array([[r, g, b]]))[0]
+    
+    def _rgb_array_to_color_names(self, colors: np.ndarray) -> List[str]:
+        """RGB値の配列 (N, 3) から色名を一括で推定"""
+        if len(self._palette) == 0:
+            return ["不明"] * len(colors)
+        return [self._palette_names[i] for i in self._nearest_palette_indices(colors)]
+    
+    def _nearest_palette_indices(self, colors: np.ndarray) -> np.ndarray:
+        """RGB値の配列 (N, 3) について最も近いパレット色の番号を一括で計算"""
+        if _nearest_palette_numba is not None:
+            return _nearest_palette_numba(np.ascontiguousarray(colors, dtype=np.int32), self._palette)
+        
+        # 全パレットとの二乗距離を一括計算し、最も近い色を選択（sqrtは順序に影響しないため省略）
+        diff = colors.astype(np.int32)[:, None, :] - self._palette[None, :, :]
+        return (diff ** 2).sum(axis=-1).argmin(axis=1)
     
-    def _extract_features(self, image: Image.Image, detected_objects: List[Dict], extracted_text: str) -> str:
+    def _extract_features(self, image: np.ndarray, detected_objects: List[Dict], extracted_text: str) -> str:
         """画像から特徴を抽出"""
         features = []
         
-        # 物体検出結果から特徴を抽出
+        # 物体検出結果から特徴を抽出（物体名 → 検出数 → 各物体のサイズの順）
         if detected_objects:
-            object_names = [obj["class_name"] for obj in detected_objects]
-            features.extend(object_names)
+            features.extend(obj["class_name"] for obj in detected_objects)
             features.append(f"検出物体数: {len(detected_objects)}個")
-            
-            # 検出された物体のサイズ情報を追加
-            for i, obj in enumerate(detected_objects):
-                bbox = obj["bbox"]
-                x1, y1, x2, y2 = bbox
-                width = x2 - x1
-                height = y2 - y1
-                object_name = obj["class_name"]
-                features.append(f"{object_name}サイズ: {int(width)}x{int(height)}px")
+            features.extend(
+                f"{obj['class_name']}サイズ: {int(obj['bbox'][2] - obj['bbox'][0])}x{int(obj['bbox'][3] - obj['bbox'][1])}px"
+                for obj in detected_objects
+            )
         
         # OCR結果から特徴を抽出
         if extracted_text:
             features.append(f"テキスト: {extracted_text}")
         
         # 画像の形状特徴
-        width, height = image.size
+        height, width = image.shape[:2]
         aspect_ratio = width / height
         if aspect_ratio > 1.5:
             features.append("横長")
@@ -492,7 +1267,24 @@ class AIEngine:
             if object_classification["score"] > 0.0:
                 return object_classification
         
+        # キーワード索引（Aho-Corasick）があれば特徴文字列を1回走査するだけで採点
+        if self._keyword_automaton is not None:
+            scores = self._score_keywords_indexed(features)
+            if len(scores) == 0:
+                return best_match
+            # 同点の場合は先に定義された中分類を優先（argmaxは最初の最大値を返す）
+            best_index = int(np.argmax(scores))
+            if scores[best_index] > best_match["score"]:
+                best_match = {
+                    "large_category": self._medium_large_names[best_index],
+                    "medium_category": self._medium_names[best_index],
+                    "name": self._medium_first_keywords[best_index],
+                    "score": float(scores[best_index])
+                }
+            return best_match
+        
         # キーワードマッチング（新しい分類データ構造に対応）
+        features_lower = features.lower()
         for category in self.classification_data:
             large_category = category["large_category_name_ja"]
             
@@ -501,7 +1293,7 @@ class AIEngine:
                 keywords = [kw["term"] for kw in medium_category_data["keywords"]]
                 
                 # キーワードマッチングスコアを計算
-                score = self._calculate_keyword_score(features, keywords)
+                score = self._calculate_keyword_score(features, keywords, features_lower)
                 
                 if score > best_match["score"]:
                     best_match = {
@@ -513,119 +1305,133 @@ class AIEngine:
         
         return best_match
     
-    def _classify_by_objects(self, detected_objects: List[Dict]) -> Dict:
-        """物体検出結果から分類を提案"""
-        # YOLOクラス名と分類のマッピング（item_classification.jsonに基づく）
-        object_to_category = {
-            # 携帯電話類（優先度最高）
-            "cell phone": {"large": "携帯電話類", "medium": "携帯電話機", "name": "スマートフォン"},
-            
-            # 電気製品類
-            "laptop": {"large": "電気製品類", "medium": "電子機器", "name": "ノートパソコン"},
-            "keyboard": {"large": "電気製品類", "medium": "電子機器", "name": "キーボード"},
-            "mouse": {"large": "電気製品類", "medium": "電子機器", "name": "マウス"},
-            "remote": {"large": "電気製品類", "medium": "その他電気製品", "name": "リモコン"},
-            "tv": {"large": "電気製品類", "medium": "その他電気製品", "name": "テレビ"},
-            "hair drier": {"large": "電気製品類", "medium": "その他電気製品", "name": "ヘアドライヤー"},
-            "toothbrush": {"large": "生活用品類", "medium": "生活用品", "name": "歯ブラシ"},
-            
-            # かばん類
-            "handbag": {"large": "かばん類", "medium": "手提げかばん", "name": "ハンドバッグ"},
-            "backpack": {"large": "かばん類", "medium": "肩掛けかばん", "name": "リュックサック"},
-            "suitcase": {"large": "かばん類", "medium": "その他かばん類", "name": "スーツケース"},
-            
-            # 傘類
-            "umbrella": {"large": "かさ類", "medium": "かさ", "name": "傘"},
-            
-            # 時計類
-            "clock": {"large": "時計類", "medium": "その他時計類", "name": "時計"},
-            
-            # 著作品類
-            "book": {"large": "著作品類", "medium": "書籍類", "name": "本"},
-            
-            # 食器・容器類
-            "bottle": {"large": "生活用品類", "medium": "食器類", "name": "ボトル"},
-            "cup": {"large": "生活用品類", "medium": "食器類", "name": "カップ"},
-            "wine glass": {"large": "生活用品類", "medium": "食器類", "name": "ワイングラス"},
-            "bowl": {"large": "生活用品類", "medium": "食器類", "name": "ボウル"},
-            
-            # 衣類・アクセサリー類
-            "tie": {"large": "衣類・履物類", "medium": "その他衣類", "name": "ネクタイ"},
-            
-            # スポーツ用品類
-            "sports ball": {"large": "趣味・娯楽用品類", "medium": "レジャー・スポーツ用品", "name": "スポーツボール"},
-            "frisbee": {"large": "趣味・娯楽用品類", "medium": "レジャー・スポーツ用品", "name": "フリスビー"},
-            "skis": {"large": "趣味・娯楽用品類", "medium": "レジャー・スポーツ用品", "name": "スキー"},
-            "snowboard": {"large": "趣味・娯楽用品類", "medium": "レジャー・スポーツ用品", "name": "スノーボード"},
-            "skateboard": {"large": "趣味・娯楽用品類", "medium": "レジャー・スポーツ用品", "name": "スケートボード"},
-            "surfboard": {"large": "趣味・娯楽用品類", "medium": "レジャー・スポーツ用品", "name": "サーフボード"},
-            "tennis racket": {"large": "趣味・娯楽用品類", "medium": "レジャー・スポーツ用品", "name": "テニスラケット"},
-            "baseball bat": {"large": "趣味・娯楽用品類", "medium": "レジャー・スポーツ用品", "name": "野球バット"},
-            "baseball glove": {"large": "趣味・娯楽用品類", "medium": "レジャー・スポーツ用品", "name": "野球グローブ"},
-            
-            # 食品類
-            "banana": {"large": "食料品類", "medium": "食料品類", "name": "バナナ"},
-            "apple": {"large": "食料品類", "medium": "食料品類", "name": "りんご"},
-            "sandwich": {"large": "食料品類", "medium": "食料品類", "name": "サンドイッチ"},
-            "orange": {"large": "食料品類", "medium": "食料品類", "name": "オレンジ"},
-            "broccoli": {"large": "食料品類", "medium": "食料品類", "name": "ブロッコリー"},
-            "carrot": {"large": "食料品類", "medium": "食料品類", "name": "にんじん"},
-            "hot dog": {"large": "食料品類", "medium": "食料品類", "name": "ホットドッグ"},
-            "pizza": {"large": "食料品類", "medium": "食料品類", "name": "ピザ"},
-            "donut": {"large": "食料品類", "medium": "食料品類", "name": "ドーナツ"},
-            "cake": {"large": "食料品類", "medium": "食料品類", "name": "ケーキ"},
-            
-            # 生活用品類
-            "scissors": {"large": "生活用品類", "medium": "工具類", "name": "ハサミ"},
-            "vase": {"large": "生活用品類", "medium": "生活用品", "name": "花瓶"},
-            
-            # 趣味・娯楽用品類
-            "teddy bear": {"large": "趣味・娯楽用品類", "medium": "その他趣味・娯楽用品類", "name": "ぬいぐるみ"},
-            
-            # 動植物類（優先度低）
-            "person": {"large": "その他", "medium": "その他", "name": "人物"},
-            "bird": {"large": "動植物類", "medium": "動物", "name": "鳥"},
-            "cat": {"large": "動植物類", "medium": "動物", "name": "猫"},
-            "dog": {"large": "動植物類", "medium": "動物", "name": "犬"},
-            "horse": {"large": "動植物類", "medium": "動物", "name": "馬"},
-            "sheep": {"large": "動植物類", "medium": "動物", "name": "羊"},
-            "cow": {"large": "動植物類", "medium": "動物", "name": "牛"},
-            "elephant": {"large": "動植物類", "medium": "動物", "name": "象"},
-            "bear": {"large": "動植物類", "medium": "動物", "name": "熊"},
-            "zebra": {"large": "動植物類", "medium": "動物", "name": "シマウマ"},
-            "giraffe": {"large": "動植物類", "medium": "動物", "name": "キリン"},
-            "potted plant": {"large": "動植物類", "medium": "植物", "name": "鉢植え"},
-            
-            # 乗り物類（優先度最低）
-            "bicycle": {"large": "生活用品類", "medium": "自転車類", "name": "自転車"},
-            "car": {"large": "その他", "medium": "その他", "name": "車"},
-            "motorcycle": {"large": "その他", "medium": "その他", "name": "バイク"},
-            "airplane": {"large": "その他", "medium": "その他", "name": "飛行機"},
-            "bus": {"large": "その他", "medium": "その他", "name": "バス"},
-            "train": {"large": "その他", "medium": "その他", "name": "電車"},
-            "truck": {"large": "その他", "medium": "その他", "name": "トラック"},
-            "boat": {"large": "その他", "medium": "その他", "name": "ボート"},
-            
-            # 家具・設備類（優先度最低）
-            "chair": {"large": "その他", "medium": "その他", "name": "椅子"},
-            "couch": {"large": "その他", "medium": "その他", "name": "ソファ"},
-            "bed": {"large": "その他", "medium": "その他", "name": "ベッド"},
-            "dining table": {"large": "その他", "medium": "その他", "name": "テーブル"},
-            "microwave": {"large": "その他", "medium": "その他", "name": "電子レンジ"},
-            "oven": {"large": "その他", "medium": "その他", "name": "オーブン"},
-            "toaster": {"large": "その他", "medium": "その他", "name": "トースター"},
-            "sink": {"large": "その他", "medium": "その他", "name": "シンク"},
-            "refrigerator": {"large": "その他", "medium": "その他", "name": "冷蔵庫"},
-            "toilet": {"large": "その他", "medium": "その他", "name": "トイレ"},
+    def _build_keyword_index(self) -> None:
+        """
+        _classify_item用のキーワード索引を構築
+        
+        全中分類の全キーワードを1つのAho-Corasickオートマトンにまとめ、
+        特徴文字列を1回走査するだけで部分一致・単語一致を検出できるようにする
+        """
+        self._keyword_automaton = None
+        # 中分類ごとの情報（中分類番号で引く並列配列）
+        self._medium_large_names: List[str] = []
+        self._medium_names: List[str] = []
+        self._medium_first_keywords: List[str] = []
+        self._medium_keywords_lower: List[List[str]] = []
+        self._medium_keyword_counts = np.zeros(0, dtype=np.float64)
+        self._empty_keyword_entries = []  # 空キーワード（常に部分一致扱い）
+        self._fuzzy_keyword_buckets = {}  # 文字数 → [(中分類番号, キーワード番号, 小文字化したキーワード)]
+        
+        if ahocorasick is None or not isinstance(self.classification_data, list):
+            return
+        
+        try:
+            automaton = ahocorasick.Automaton()
+            for category in self.classification_data:
+                large_category = category["large_category_name_ja"]
+                for medium_category_data in category["medium_categories"]:
+                    medium_index = len(self._medium_names)
+                    keywords = [kw["term"] for kw in medium_category_data["keywords"]]
+                    keywords_lower = [keyword.lower() for keyword in keywords]
+                    self._medium_large_names.append(large_category)
+                    self._medium_names.append(medium_category_data["medium_category_name_ja"])
+                    self._medium_first_keywords.append(keywords[0] if keywords else "不明")
+                    self._medium_keywords_lower.append(keywords_lower)
+                    
+                    for keyword_index, keyword_lower in enumerate(keywords_lower):
+                        if not keyword_lower:
+                            self._empty_keyword_entries.append((medium_index, keyword_index))
+                            continue
+                        
+                        # キーワード全体（部分一致判定用）
+                        self._add_keyword_entry(automaton, keyword_lower, (medium_index, keyword_index, False))
+                        
+                        # キーワード内の各単語（単語単位の部分一致判定用）
+                        words = keyword_lower.split()
+                        if words != [keyword_lower]:
+                            for word in set(words):
+                                self._add_keyword_entry(automaton, word, (medium_index, keyword_index, True))
+                        
+                        # 文字列類似度の判定対象を文字数で分類しておく
+                        self._fuzzy_keyword_buckets.setdefault(len(keyword_lower), []).append(
+                            (medium_index, keyword_index, keyword_lower)
+                        )
+            
+            automaton.make_automaton()
+            # キーワードのない中分類は加点もないため、0除算を避けるだけでよい
+            self._medium_keyword_counts = np.maximum(
+                np.array([len(keywords) for keywords in self._medium_keywords_lower], dtype=np.float64), 1.0
+            )
+            self._keyword_automaton = automaton
+        except Exception as e:
+            logger.error(f"キーワード索引構築エラー: {e}")
+            self._keyword_automaton = None
+    
+    def _add_keyword_entry(self, automaton, key: str, entry: Tuple) -> None:
+        """オートマトンのキーにエントリを追加（同じキーは1つのリストにまとめる）"""
+        if key in automaton:
+            automaton.get(key).append(entry)
+        else:
+            automaton.add_word(key, [entry])
+    
+    def _score_keywords_indexed(self, features: str) -> np.ndarray:
+        """
+        キーワード索引を使って中分類ごとのキーワードマッチングスコアを計算
+        （_calculate_keyword_scoreと同じ採点規則）
+        
+        Args:
+            features: 特徴文字列
             
-            # 道路・交通関連（優先度最低）
-            "traffic light": {"large": "その他", "medium": "その他", "name": "信号機"},
-            "fire hydrant": {"large": "その他", "medium": "その他", "name": "消火栓"},
-            "stop sign": {"large": "その他", "medium": "その他", "name": "停止標識"},
-            "parking meter": {"large": "その他", "medium": "その他", "name": "パーキングメーター"},
-            "bench": {"large": "その他", "medium": "その他", "name": "ベンチ"},
-        }
+        Returns:
+            中分類番号ごとのスコア配列
+        """
+        if not features:
+            return np.zeros(len(self._medium_names), dtype=np.float64)
         
+        features_lower = features.lower()
+        contributions = {}  # (中分類番号, キーワード番号) → 加点
+        word_hits = set()
+        
+        # 完全一致・部分一致
+        for medium_index, keyword_index in self._empty_keyword_entries:
+            contributions[(medium_index, keyword_index)] = 1.0
+        for _, entries in self._keyword_automaton.iter(features_lower):
+            for medium_index, keyword_index, is_word in entries:
+                key = (medium_index, keyword_index)
+                if is_word:
+                    word_hits.add(key)
+                elif key not in contributions:
+                    keyword_lower = self._medium_keywords_lower[medium_index][keyword_index]
+                    contributions[key] = 2.0 if keyword_lower == features_lower else 1.0
+        
+        # 単語単位での部分一致
+        for key in word_hits:
+            contributions.setdefault(key, 0.5)
+        
+        # 文字列の類似度（文字数の組み合わせから0.7を超え得ないものは計算せずに除外）
+        feature_length = len(features_lower)
+        for keyword_length, entries in self._fuzzy_keyword_buckets.items():
+            if not self._may_be_similar(feature_length, keyword_length):
+                continue
+            for medium_index, keyword_index, keyword_lower in entries:
+                key = (medium_index, keyword_index)
+                if key in contributions:
+                    continue
+                similarity = self._calculate_string_similarity(features_lower, keyword_lower)
+                if similarity > 0.7:
+                    contributions[key] = similarity * 0.3
+        
+        # 中分類ごとに集計（キーワード順に加算し、キーワード数で割る）
+        if not contributions:
+            return np.zeros(len(self._medium_names), dtype=np.float64)
+        keys = sorted(contributions)
+        medium_indices = np.fromiter((medium_index for medium_index, _ in keys), dtype=np.intp, count=len(keys))
+        values = np.fromiter((contributions[key] for key in keys), dtype=np.float64, count=len(keys))
+        totals = np.bincount(medium_indices, weights=values, minlength=len(self._medium_names))
+        return totals / self._medium_keyword_counts
+    
+    def _classify_by_objects(self, detected_objects: List[Dict]) -> Dict:
+        """物体検出結果から分類を提案"""
         best_score = 0.0
         best_category = {
             "large_category": "その他",
@@ -634,22 +1440,16 @@ class AIEngine:
             "score": 0.0
         }
         
-        # 拾得物として適切な物品の優先度を設定
-        priority_items = {
-            "cell phone", "laptop", "handbag", "backpack", "suitcase", "umbrella",
-            "book", "clock", "bottle", "cup", "tie", "scissors", "teddy bear"
-        }
-        
         for obj in detected_objects:
             class_name = obj["class_name"]
             confidence = obj["confidence"]
             
-            if class_name in object_to_category:
-                category_info = object_to_category[class_name]
+            if class_name in OBJECT_TO_CATEGORY:
+                category_info = OBJECT_TO_CATEGORY[class_name]
                 
                 # 優先度に基づいてスコアを調整
                 base_score = confidence
-                if class_name in priority_items:
+                if class_name in PRIORITY_OBJECT_NAMES:
                     # 優先物品はスコアを1.2倍に
                     score = base_score * 1.2
                 else:
@@ -667,12 +1467,13 @@ class AIEngine:
         
         return best_category
     
-    def _calculate_keyword_score(self, features: str, keywords: List[str]) -> float:
-        """キーワードマッチングスコアを計算"""
+    def _calculate_keyword_score(self, features: str, keywords: List[str], features_lower: Optional[str] = None) -> float:
+        """キーワードマッチングスコアを計算（features_lowerを渡すと小文字化を省略）"""
         if not features or not keywords:
             return 0.0
         
-        features_lower = features.lower()
+        if features_lower is None:
+            features_lower = features.lower()
         score = 0.0
         
         for keyword in keywords:
@@ -687,8 +1488,8 @@ class AIEngine:
             # 単語単位での部分一致（中スコア）
             elif any(word in features_lower for word in keyword_lower.split()):
                 score += 0.5
-            # 文字列の類似度（低スコア）
-            else:
+            # 文字列の類似度（低スコア）。文字数の差から0.7を超え得ない場合は計算しない
+            elif self._may_be_similar(len(features_lower), len(keyword_lower)):
                 # 文字列の類似度を計算
                 similarity = self._calculate_string_similarity(features_lower, keyword_lower)
                 if similarity > 0.7:  # 70%以上の類似度
@@ -696,23 +1497,28 @@ class AIEngine:
         
         return score / len(keywords) if keywords else 0.0
     
+    @staticmethod
+    def _may_be_similar(length1: int, length2: int) -> bool:
+        """
+        文字数だけから、文字列の類似度が0.7を超え得るかを判定
+        
+        類似度は 2×短い方の文字数/合計文字数 を超えないため、これが0.7未満なら計算不要
+        （浮動小数点誤差を避けるため整数で比較）
+        """
+        return 20 * min(length1, length2) >= 7 * (length1 + length2)
+    
     def _calculate_string_similarity(self, str1: str, str2: str) -> float:
-        """文字列の類似度を計算（レーベンシュタイン距離ベース）"""
+        """文字列の類似度を計算（編集距離ベース、0.0-1.0）"""
         if not str1 or not str2:
             return 0.0
         
-        # 簡易的な類似度計算
         if str1 == str2:
             return 1.0
         
-        # 共通文字数をカウント
-        common_chars = set(str1) & set(str2)
-        total_chars = set(str1) | set(str2)
-        
-        if not total_chars:
-            return 0.0
-        
-        return len(common_chars) / len(total_chars)
+        # 挿入・削除の編集距離を文字数で正規化した類似度
+        if fuzz is not None:
+            return fuzz.ratio(str1, str2) / 100.0
+        return difflib.SequenceMatcher(None, str1, str2).ratio()
     
     def _calculate_confidence(self, classification_result: Dict, features: str, detected_objects: List[Dict]) -> float:
         """分類結果の信頼度を計算"""
@@ -747,7 +1553,7 @@ class AIEngine:
             "confidence": 0.0
         }
     
-    def generate_vector(self, text: str) -> List[float]:
+    def generate_vector(self, text: str) -> np.ndarray:
         """
         テキストからベクトルを生成（セマンティック検索用）
         
@@ -755,73 +1561,621 @@ class AIEngine:
             text: ベクトル化するテキスト
             
         Returns:
-            ベクトル（浮動小数点数のリスト）
+            ベクトル（float32の1次元配列、長さVECTOR_DIM。キャッシュと共有されるため読み取り専用）
         """
         try:
             if not text:
-                return [0.0] * 384  # デフォルトベクトルサイズ
+                return np.zeros(VECTOR_DIM, dtype=np.float32)  # デフォルトベクトルサイズ
             
-            # テキストをベクトル化
-            vector = self.sentence_model.encode(text)
-            return vector.tolist()
+            # テキストをベクトル化（空白の違いだけのテキストも同じキャッシュを再利用）
+            return self._encode_text(self._canonical_text(text))
             
         except Exception as e:
             logger.error(f"ベクトル生成エラー: {e}")
-            return [0.0] * 384
+            return np.zeros(VECTOR_DIM, dtype=np.float32)
+    
+    @staticmethod
+    def _canonical_text(text: str) -> str:
+        """
+        ベクトル化する前にテキストの空白を正規化（前後の空白を除き、連続する空白を1つにまとめる）
+        
+        トークナイザーは空白の数を区別しないためベクトルは変わらず、キャッシュのヒット率だけが上がる
+        """
+        return " ".join(text.split())
+    
+    def _encode_text(self, text: str) -> np.ndarray:
+        """テキスト1件をベクトル化（キャッシュで共有されるため読み取り専用の配列を返す）"""
+        return self._encode_batch([text])[0]
+    
+    def _vector_cache_key(self, text: str) -> str:
+        """ベクトルキャッシュのキー（モデルが変わった場合に古いベクトルを使わないようモデル名を含める）"""
+        return hashlib.blake2b(f"{SENTENCE_MODEL_NAME}\0{text}".encode("utf-8"), digest_size=16).hexdigest()
     
-    def calculate_similarity(self, vec1: List[float], vec2: List[float]) -> float:
+    def _load_vector_cache(self, cache_path: str) -> "OrderedDict[str, np.ndarray]":
+        """
+        保存済みのベクトルキャッシュを読み込み
+        
+        Args:
+            cache_path: キャッシュファイルのパス
+            
+        Returns:
+            キャッシュキー → ベクトルの辞書（読み込めない場合は空）
+        """
+        try:
+            if os.path.exists(cache_path):
+                with open(cache_path, 'rb') as f:
+                    cache = OrderedDict(pickle.load(f))
+                # 上限を超える分は古いものから捨てる
+                while len(cache) > VECTOR_DISK_CACHE_SIZE:
+                    cache.popitem(last=False)
+                for vector in cache.values():
+                    vector.setflags(write=False)
+                logger.info(f"ベクトルキャッシュを読み込みました: {len(cache)}件")
+                return cache
+        except Exception as e:
+            logger.warning(f"ベクトルキャッシュの読み込みに失敗: {e}")
+        return OrderedDict()
+    
+    def save_vector_cache(self, cache_path: str = VECTOR_DISK_CACHE_PATH) -> None:
+        """
+        ベクトルキャッシュをファイルに保存（最近使われた順を保ったまま最大VECTOR_DISK_CACHE_SIZE件）
+        
+        Args:
+            cache_path: キャッシュファイルのパス
+        """
+        try:
+            with self._vector_disk_cache_lock:
+                items = list(self._vector_disk_cache.items())
+            if not items:
+                return
+            os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+            # 書き込み途中で終了しても既存のキャッシュが壊れないよう、一時ファイル経由で置き換える
+            # （複数ワーカーが同時に終了しても書き込みが混ざらないよう、一時ファイル名にプロセスIDを含める）
+            temp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                pickle.dump(dict(items), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, cache_path)
+        except Exception as e:
+            logger.warning(f"ベクトルキャッシュの保存に失敗: {e}")
+    
+    def generate_vector_list(self, text: str) -> List[float]:
+        """
+        テキストからベクトルを生成し、浮動小数点数のリストで返す（DB保存用）
+        
+        Args:
+            text: ベクトル化するテキスト
+            
+        Returns:
+            ベクトル（浮動小数点数のリスト）
+        """
+        return self.generate_vector(text).tolist()
+    
+    def generate_vectors(self, texts: List[str]) -> np.ndarray:
+        """
+        複数のテキストをまとめてベクトル化（バッチ推論）
+        
+        Args:
+            texts: ベクトル化するテキストのリスト
+            
+        Returns:
+            ベクトルの配列 (len(texts), VECTOR_DIM)。空文字列はゼロベクトル
+        """
+        vectors = np.zeros((len(texts), VECTOR_DIM), dtype=np.float32)
+        try:
+            # 同じテキスト（空白の違いのみを含む）は1回だけベクトル化する
+            canonical_texts = [self._canonical_text(text) if text else None for text in texts]
+            unique_texts = list(dict.fromkeys(text for text in canonical_texts if text is not None))
+            if unique_texts:
+                encoded = dict(zip(unique_texts, self._encode_batch(unique_texts)))
+                for i, text in enumerate(canonical_texts):
+                    if text is not None:
+                        vectors[i] = encoded[text]
+        except Exception as e:
+            logger.error(f"ベクトル生成エラー: {e}")
+        return vectors
+    
+    def _encode_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """
+        テキストをまとめてベクトル化（キャッシュ済みのものは再利用し、未計算分だけを1回のバッチ推論で処理）
+        
+        キャッシュは最大VECTOR_DISK_CACHE_SIZE件のLRUで、上限を超えると最も長く使われていないものから捨てる
+        
+        Args:
+            texts: ベクトル化する空でないテキストのリスト
+            
+        Returns:
+            読み取り専用のベクトルのリスト（textsと同じ順序）
+        """
+        keys = [self._vector_cache_key(text) for text in texts]
+        vectors = []
+        with self._vector_disk_cache_lock:
+            for key in keys:
+                vector = self._vector_disk_cache.get(key)
+                if vector is not None:
+                    # ヒットしたものを最近使ったものとして末尾へ移動
+                    self._vector_disk_cache.move_to_end(key)
+                vectors.append(vector)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if not missing:
+            return vectors
+        
+        import torch
+        
+        # FP16モデルの出力もここでfloat32に変換される（長さ順の並べ替えはencode内部で行われる）
+        with torch.inference_mode():
+            encoded = np.asarray(self.sentence_model.encode(
+                [texts[i] for i in missing],
+                batch_size=64,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            ), dtype=np.float32)
+        
+        with self._vector_disk_cache_lock:
+            for i, vector in zip(missing, encoded):
+                vector = vector.copy()
+                vector.setflags(write=False)
+                self._vector_disk_cache[keys[i]] = vector
+                self._vector_disk_cache.move_to_end(keys[i])
+                vectors[i] = vector
+            while len(self._vector_disk_cache) > VECTOR_DISK_CACHE_SIZE:
+                self._vector_disk_cache.popitem(last=False)
+        return vectors
+    
+    def calculate_similarity(self, vec1, vec2) -> float:
         """
         2つのベクトル間のコサイン類似度を計算
         
         Args:
-            vec1: ベクトル1
-            vec2: ベクトル2
+            vec1: ベクトル1（リストまたはnp.ndarray）
+            vec2: ベクトル2（リストまたはnp.ndarray）
             
         Returns:
             類似度スコア（0.0-1.0）
         """
         try:
-            if not vec1 or not vec2 or len(vec1) != len(vec2):
+            if vec1 is None or vec2 is None or len(vec1) == 0 or len(vec1) != len(vec2):
                 return 0.0
             
-            # コサイン類似度を計算
-            similarity = cosine_similarity([vec1], [vec2])[0][0]
-            return float(similarity)
+            # コサイン類似度を計算（ゼロベクトルは類似度0）
+            a = self._as_f32(vec1)
+            b = self._as_f32(vec2)
+            if simsimd is not None:
+                # SimSIMDはゼロベクトルとの距離を0または1とするため、先に除外する
+                if not a.any() or not b.any():
+                    return 0.0
+                return 1.0 - float(simsimd.cosine(a, b))
+            if _cosine_similarity_numba is not None:
+                return float(_cosine_similarity_numba(a, b))
+            # 1次元のままBLASの内積3回で計算（2次元化や中間配列を作らない）
+            a_norm = float(np.dot(a, a))
+            b_norm = float(np.dot(b, b))
+            if a_norm == 0.0 or b_norm == 0.0:
+                return 0.0
+            return float(np.dot(a, b)) / math.sqrt(a_norm * b_norm)
             
         except Exception as e:
             logger.error(f"類似度計算エラー: {e}")
             return 0.0
     
-    def search_similar_items(self, query_text: str, item_vectors: List[Tuple[str, List[float]]]) -> List[Tuple[str, float]]:
+    def calculate_similarities(
+        self,
+        query_vector,
+        vectors: List,
+        cache_keys: Optional[List[Tuple[str, str]]] = None
+    ) -> np.ndarray:
         """
-        セマンティック検索を実行
+        クエリベクトルと複数ベクトルのコサイン類似度を1回の行列ベクトル積で計算
+        
+        Args:
+            query_vector: クエリベクトル（リストまたはnp.ndarray）
+            vectors: ベクトルのリスト（Noneや次元が一致しないものは類似度0）
+            cache_keys: vectorsと同じ順序の(アイテムID, バージョン)のリスト。指定した場合、
+                バージョンが変わっていないアイテムは正規化済みベクトルをキャッシュから再利用する
+            
+        Returns:
+            類似度の配列（vectorsと同じ順序）
+        """
+        similarities = np.zeros(len(vectors), dtype=np.float32)
+        try:
+            query = self._as_f32(query_vector)
+            query_norm = float(np.dot(query, query)) if query.ndim == 1 else 0.0
+            if query_norm == 0.0 or not len(vectors):
+                return similarities
+            
+            matrix = self._normalized_vector_matrix(vectors, len(query), cache_keys)
+            similarities = matrix @ (query / math.sqrt(query_norm))
+        except Exception as e:
+            logger.error(f"類似度計算エラー: {e}")
+        return similarities
+    
+    def _normalized_vector_matrix(
+        self,
+        vectors: List,
+        dim: int,
+        cache_keys: Optional[List[Tuple[str, str]]]
+    ) -> np.ndarray:
+        """
+        ベクトルのリストをL2正規化済みの(件数, dim)の連続した行列にまとめる（Noneや次元不一致、ゼロベクトルはゼロ行）
+        
+        Args:
+            vectors: ベクトルのリスト
+            dim: ベクトルの次元
+            cache_keys: (アイテムID, バージョン)のリスト（Noneの場合はキャッシュを使わない）
+            
+        Returns:
+            正規化済みのベクトル行列
+        """
+        matrix = np.zeros((len(vectors), dim), dtype=np.float32)
+        missing = range(len(vectors))
+        if cache_keys is not None:
+            missing = []
+            with self._item_vector_cache_lock:
+                for i, (item_id, version) in enumerate(cache_keys):
+                    cached = self._item_vector_cache.get(item_id)
+                    if cached is not None and cached[0] == version and len(cached[1]) == dim:
+                        self._item_vector_cache.move_to_end(item_id)
+                        matrix[i] = cached[1]
+                    else:
+                        missing.append(i)
+        
+        rows = [i for i in missing if vectors[i] is not None and len(vectors[i]) == dim]
+        if rows:
+            block = np.array([vectors[i] for i in rows], dtype=np.float32)
+            norms = np.linalg.norm(block, axis=1, keepdims=True)
+            # ゼロベクトルはゼロ行のまま（0除算しないよう分母を1に置き換える）
+            matrix[rows] = np.where(norms > 0, block / np.where(norms > 0, norms, 1.0), 0.0)
+        
+        if cache_keys is not None and missing:
+            with self._item_vector_cache_lock:
+                for i in missing:
+                    item_id, version = cache_keys[i]
+                    vector = matrix[i].copy()
+                    vector.setflags(write=False)
+                    self._item_vector_cache[item_id] = (version, vector)
+                    self._item_vector_cache.move_to_end(item_id)
+                while len(self._item_vector_cache) > ITEM_VECTOR_CACHE_SIZE:
+                    self._item_vector_cache.popitem(last=False)
+        return matrix
+    
+    @staticmethod
+    def _as_f32(vector) -> np.ndarray:
+        """ベクトルを連続したfloat32配列に変換（既に該当する配列ならコピーしない）"""
+        return np.ascontiguousarray(vector, dtype=np.float32)
+    
+    def register_item_vectors(self, item_vectors: List[Tuple[str, List[float]]]) -> None:
+        """
+        セマンティック検索の対象となるアイテムベクトルを登録（既存の登録内容は置き換え）
         
         Args:
-            query_text: 検索クエリ
             item_vectors: (item_id, vector)のリスト
+        """
+        matrix = self._item_vectors_to_matrix(item_vectors)
+        with self._corpus_lock:
+            self._item_ids = []
+            self._item_matrix = np.zeros((0, VECTOR_DIM), dtype=np.int8)
+            self._ann_index = None
+            self._append_corpus([item_id for item_id, _ in item_vectors], matrix)
+    
+    def add_item_vectors(self, item_vectors: List[Tuple[str, List[float]]]) -> None:
+        """
+        セマンティック検索の対象にアイテムベクトルを追加
+        
+        Args:
+            item_vectors: (item_id, vector)のリスト
+        """
+        matrix = self._item_vectors_to_matrix(item_vectors)
+        with self._corpus_lock:
+            self._append_corpus([item_id for item_id, _ in item_vectors], matrix)
+    
+    @staticmethod
+    def _item_vectors_to_matrix(item_vectors: List[Tuple[str, List[float]]]) -> np.ndarray:
+        """(item_id, vector)のリストをfloat32のベクトル行列に変換（次元が一致しないベクトルはゼロ行＝類似度0）"""
+        matrix = np.zeros((len(item_vectors), VECTOR_DIM), dtype=np.float32)
+        for row, (_, vector) in enumerate(item_vectors):
+            if vector is not None and len(vector) == VECTOR_DIM:
+                matrix[row] = vector
+        return matrix
+    
+    def register_corpus(self, ids: List[str], vectors: np.ndarray) -> None:
+        """
+        セマンティック検索の対象となるアイテムベクトルを配列のまま登録（既存の登録内容は置き換え）
+        
+        (item_id, vector)のタプルを経由せず、ID列とベクトル行列を直接受け取る
+        
+        Args:
+            ids: アイテムIDのリスト
+            vectors: (アイテム数, VECTOR_DIM)のベクトル行列
+        """
+        matrix = np.array(vectors, dtype=np.float32, order="C")
+        if matrix.size == 0:
+            matrix = matrix.reshape(0, VECTOR_DIM)
+        if matrix.ndim != 2 or matrix.shape[1] != VECTOR_DIM:
+            raise ValueError(f"ベクトル行列の形状が不正です: {matrix.shape}")
+        if len(ids) != len(matrix):
+            raise ValueError(f"IDの数({len(ids)})とベクトルの数({len(matrix)})が一致しません")
+        
+        with self._corpus_lock:
+            self._item_ids = []
+            self._item_matrix = np.zeros((0, VECTOR_DIM), dtype=np.int8)
+            self._ann_index = None
+            self._append_corpus(list(ids), matrix)
+    
+    def _append_corpus(self, ids: List[str], matrix: np.ndarray) -> None:
+        """
+        ID列とベクトル行列（float32、書き換え可）を検索対象に追加（_corpus_lockを保持した状態で呼び出す）
+        
+        Args:
+            ids: アイテムIDのリスト
+            matrix: (アイテム数, VECTOR_DIM)のベクトル行列（正規化のため上書きされる）
+        """
+        quantized = self._normalize_and_quantize(matrix)
+        # _item_idsは末尾への追加のみ（検索中のスナップショットが参照する添字は変わらない）
+        self._item_ids.extend(ids)
+        self._item_matrix = np.concatenate([self._item_matrix, quantized])
+        self._corpus_dirty = True
+        self._update_ann_index(quantized)
+    
+    def save_corpus(self, matrix_path: str = CORPUS_MATRIX_PATH, ids_path: str = CORPUS_IDS_PATH) -> None:
+        """
+        セマンティック検索対象のベクトル行列とアイテムIDをファイルに保存（読み込み・保存時点から変更がなければ何もしない）
+        
+        Args:
+            matrix_path: ベクトル行列（.npy）の保存先
+            ids_path: アイテムID（JSON）の保存先
+        """
+        try:
+            with self._corpus_lock:
+                # 変更がなければ保存不要（読み込んだファイルはメモリマップ中で、置き換えられない環境もある）
+                if not self._corpus_dirty:
+                    return
+                os.makedirs(os.path.dirname(matrix_path) or '.', exist_ok=True)
+                os.makedirs(os.path.dirname(ids_path) or '.', exist_ok=True)
+                # 書き込み途中で終了しても既存のファイルが壊れないよう、一時ファイル経由で置き換える
+                # （複数ワーカーが同時に終了しても書き込みが混ざらないよう、一時ファイル名にプロセスIDを含める）
+                temp_matrix_path = f"{matrix_path}.{os.getpid()}.tmp"
+                temp_ids_path = f"{ids_path}.{os.getpid()}.tmp"
+                with open(temp_matrix_path, 'wb') as f:
+                    np.save(f, self._item_matrix)
+                with open(temp_ids_path, 'w', encoding='utf-8') as f:
+                    json.dump(self._item_ids, f, ensure_ascii=False)
+                os.replace(temp_matrix_path, matrix_path)
+                os.replace(temp_ids_path, ids_path)
+                self._corpus_dirty = False
+                logger.info(f"検索対象ベクトルを保存しました: {len(self._item_ids)}件")
+        except Exception as e:
+            logger.warning(f"検索対象ベクトルの保存に失敗: {e}")
+    
+    def load_corpus(self, matrix_path: str = CORPUS_MATRIX_PATH, ids_path: str = CORPUS_IDS_PATH) -> bool:
+        """
+        保存済みのベクトル行列とアイテムIDを検索対象として読み込み（既存の登録内容は置き換え）
+        
+        行列はメモリマップで開くため、起動時に全体を読み込まず、検索時に必要なページだけが読まれる
+        
+        Args:
+            matrix_path: ベクトル行列（.npy）のパス
+            ids_path: アイテムID（JSON）のパス
             
         Returns:
-            (item_id, similarity_score)のリスト（類似度順）
+            読み込めた場合はTrue
         """
         try:
-            # クエリをベクトル化
-            query_vector = self.generate_vector(query_text)
+            matrix = np.load(matrix_path, mmap_mode='r')
+            with open(ids_path, 'r', encoding='utf-8') as f:
+                item_ids = json.load(f)
+            if matrix.dtype != np.int8 or matrix.ndim != 2 or matrix.shape != (len(item_ids), VECTOR_DIM):
+                logger.warning(f"検索対象ベクトルの形式が一致しないため読み込みません: {matrix.shape}")
+                return False
+        except Exception as e:
+            logger.warning(f"検索対象ベクトルの読み込みに失敗: {e}")
+            return False
+        
+        with self._corpus_lock:
+            self._item_ids = item_ids
+            self._item_matrix = matrix
+            self._ann_index = None
+            self._corpus_dirty = False
+            self._update_ann_index(matrix)
+        logger.info(f"検索対象ベクトルを読み込みました: {len(item_ids)}件")
+        return True
+    
+    def _update_ann_index(self, new_rows: np.ndarray) -> None:
+        """近似最近傍探索（HNSW）インデックスを更新"""
+        if faiss is None and hnswlib is None:
+            return
+        
+        if self._ann_index is None:
+            # 件数が少ないうちは全件走査の方が速いため構築しない
+            if len(self._item_ids) < HNSW_MIN_ITEMS:
+                return
+            # 閾値を超えた時点で登録済みの全ベクトルから構築
+            if faiss is not None:
+                self._ann_index = faiss.IndexHNSWFlat(VECTOR_DIM, 32, faiss.METRIC_INNER_PRODUCT)
+                self._ann_index.hnsw.efSearch = 64
+            else:
+                self._ann_index = hnswlib.Index(space="ip", dim=VECTOR_DIM)
+                self._ann_index.init_index(max_elements=len(self._item_ids), M=16, ef_construction=200)
+                self._ann_index.set_ef(64)
+            new_rows = self._item_matrix
+        
+        vectors = self._dequantize_vectors(new_rows)
+        if faiss is not None:
+            self._ann_index.add(vectors)
+            return
+        
+        # hnswlibは容量を超えて追加できないため、足りなければ倍々で拡張する
+        start = self._ann_index.get_current_count()
+        capacity = self._ann_index.get_max_elements()
+        if start + len(vectors) > capacity:
+            self._ann_index.resize_index(max(capacity * 2, start + len(vectors)))
+        # ラベルは登録順の行番号（_item_idsの添字）
+        self._ann_index.add_items(vectors, np.arange(start, start + len(vectors)))
+    
+    def _search_ann_index(self, query_vector: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        近似最近傍探索インデックスから上位k件を検索
+        
+        Args:
+            query_vector: L2正規化済みのクエリベクトル
+            top_k: 上位何件を返すか
             
-            # 各アイテムとの類似度を計算
-            similarities = []
-            for item_id, item_vector in item_vectors:
-                similarity = self.calculate_similarity(query_vector, item_vector)
-                similarities.append((item_id, similarity))
+        Returns:
+            (類似度の配列, _item_idsの添字の配列)。見つからなかった枠の添字は-1
+        """
+        query = query_vector.reshape(1, -1).astype(np.float32)
+        if faiss is not None:
+            scores, indices = self._ann_index.search(query, top_k)
+            return scores[0], indices[0]
+        
+        # 探索幅がk未満だと十分な候補が得られないため広げる
+        self._ann_index.set_ef(max(64, top_k))
+        labels, distances = self._ann_index.knn_query(query, k=top_k)
+        # hnswlibの内積空間の距離は 1 - 内積
+        return 1.0 - distances[0], labels[0].astype(np.int64)
+    
+    def _normalize_and_quantize(self, matrix: np.ndarray) -> np.ndarray:
+        """
+        ベクトル行列（float32、書き換え可）をL2正規化してint8に量子化
+        
+        登録時に正規化・量子化しておき、検索時は整数内積だけでコサイン類似度を得る
+        """
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+        return self._quantize_vectors(matrix)
+    
+    def _quantize_vectors(self, vectors: np.ndarray) -> np.ndarray:
+        """L2正規化済みベクトルをint8に量子化"""
+        return np.clip(np.round(vectors * QUANT_SCALE), -QUANT_SCALE, QUANT_SCALE).astype(np.int8)
+    
+    def _dequantize_vectors(self, vectors: np.ndarray) -> np.ndarray:
+        """int8量子化ベクトルをfloat32に復元"""
+        return np.ascontiguousarray(vectors, dtype=np.float32) / QUANT_SCALE
+    
+    def search_similar_items(
+        self,
+        query_text: str,
+        item_vectors: Optional[List[Tuple[str, List[float]]]] = None,
+        top_k: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        セマンティック検索を実行
+        
+        Args:
+            query_text: 検索クエリ
+            item_vectors: (item_id, vector)のリスト（省略時は登録済みのベクトルを使用。
+                指定した場合は登録済みの検索対象を変更せず、渡されたベクトルだけを対象にする）
+            top_k: 上位何件を返すか（省略時は全件）
             
-            # 類似度で降順ソート
-            similarities.sort(key=lambda x: x[1], reverse=True)
+        Returns:
+            (item_id, similarity_score)のリスト（類似度順）
+        """
+        try:
+            if item_vectors is not None:
+                # 共有の検索対象（HNSWインデックスを含む）は作り直さず、この呼び出しの中だけで量子化して全件走査
+                item_ids = [item_id for item_id, _ in item_vectors]
+                item_matrix = self._normalize_and_quantize(self._item_vectors_to_matrix(item_vectors))
+            else:
+                with self._corpus_lock:
+                    item_ids = self._item_ids
+                    item_matrix = self._item_matrix
+            if not len(item_matrix):
+                return []
             
-            return similarities
+            # クエリをベクトル化して正規化
+            query_vector = self.generate_vector(query_text)
+            query_vector = query_vector / (np.linalg.norm(query_vector) + 1e-12)
+            
+            # 登録済みの検索対象の上位k件のみ必要で、HNSWインデックスがあれば近似最近傍探索を使用
+            if item_vectors is None and top_k is not None:
+                with self._corpus_lock:
+                    if self._ann_index is not None and self._item_matrix is item_matrix and top_k < len(item_matrix):
+                        scores, indices = self._search_ann_index(query_vector, top_k)
+                        return [
+                            (item_ids[i], float(score))
+                            for score, i in zip(scores, indices) if i >= 0
+                        ]
+            
+            # 全アイテムとの類似度をint8の内積で一括計算
+            quantized_query = self._quantize_vectors(query_vector)
+            scores = self._int8_dot_scores(quantized_query, item_matrix) / float(QUANT_SCALE * QUANT_SCALE)
+            
+            # 類似度で降順ソート（同点は登録順を維持）
+            order = self._top_k_indices(scores, top_k)
+            return [(item_ids[i], float(scores[i])) for i in order]
             
         except Exception as e:
             logger.error(f"セマンティック検索エラー: {e}")
             return []
 
+    def _int8_dot_scores(self, quantized_query: np.ndarray, item_matrix: np.ndarray) -> np.ndarray:
+        """
+        int8ベクトル行列と量子化済みクエリの内積を計算
+        
+        SimSIMDがあればint8のまま内積を取るSIMDカーネル（VNNI等）を使い、
+        なければNumPyでint32に累積して計算する（どちらも結果は同じ整数値）
+        
+        Args:
+            quantized_query: int8に量子化したクエリベクトル
+            item_matrix: int8に量子化したアイテムのベクトル行列
+            
+        Returns:
+            各アイテムとの内積の配列
+        """
+        if simsimd is not None:
+            try:
+                scores = simsimd.cdist(quantized_query[np.newaxis], item_matrix, metric="dot")
+                return np.asarray(scores, dtype=np.float64)[0]
+            except (TypeError, ValueError) as e:
+                # int8の内積に対応していない古いバージョンではNumPyで計算
+                logger.debug(f"SimSIMDのint8内積が使えません: {e}")
+        # int32で累積して桁あふれを防ぐ
+        return np.einsum("ij,j->i", item_matrix, quantized_query, dtype=np.int32)
+    
+    @staticmethod
+    def _top_k_indices(scores: np.ndarray, top_k: Optional[int]) -> np.ndarray:
+        """
+        スコアの降順に上位k件のインデックスを返す（同点はインデックス順）
+        
+        Args:
+            scores: スコアの1次元配列
+            top_k: 上位何件を返すか（Noneの場合は全件）
+            
+        Returns:
+            インデックスの配列
+        """
+        if top_k is None or top_k >= len(scores):
+            return np.argsort(-scores, kind="stable")[:top_k]
+        if top_k <= 0:
+            return np.empty(0, dtype=np.intp)
+        
+        # 全件ソートせず、k番目のスコアを部分選択で求めてから候補だけを並べ替える
+        # （k番目と同点の候補も含めることで、全件ソートと同じ結果になる）
+        kth_score = -np.partition(-scores, top_k - 1)[top_k - 1]
+        candidates = np.flatnonzero(scores >= kth_score)
+        return candidates[np.argsort(-scores[candidates], kind="stable")[:top_k]]
+
+    def _build_term_to_category(self) -> Dict[str, Tuple[str, str]]:
+        """
+        分類キーワード → (大分類名, 中分類名)の逆引き辞書を構築（同じキーワードは先に定義された分類を優先）
+        
+        Returns:
+            逆引き辞書
+        """
+        term_to_category = {}
+        if not isinstance(self.classification_data, list):
+            return term_to_category
+        
+        try:
+            for large in self.classification_data:
+                for medium in large.get("medium_categories", []):
+                    for keyword in medium.get("keywords", []):
+                        if isinstance(keyword, dict) and keyword.get("term"):
+                            term_to_category.setdefault(keyword["term"], (
+                                large["large_category_name_ja"],
+                                medium["medium_category_name_ja"]
+                            ))
+        except Exception as e:
+            logger.error(f"分類逆引き辞書構築エラー: {e}")
+        return term_to_category
+    
     def suggest_category_by_name(self, item_name: str) -> Dict:
         try:
             if not item_name or not item_name.strip():
@@ -834,18 +2188,16 @@ class AIEngine:
             suggestions = self.semantic_classifier.suggest_categories(item_name, top_n=1)
             if suggestions:
                 best_term, score = suggestions[0]
-                # best_term から大分類・中分類をitem_classification.jsonから逆引きする処理を追加
-                # 例: self.classification_data から該当termを検索し、large_category_name_ja, medium_category_name_jaを取得
-                for large in self.classification_data:
-                    for medium in large.get("medium_categories", []):
-                        for keyword in medium.get("keywords", []):
-                            if keyword.get("term") == best_term:
-                                return {
-                                    "large_category": large["large_category_name_ja"],
-                                    "medium_category": medium["medium_category_name_ja"],
-                                    "name": item_name,
-                                    "confidence": score
-                                }
+                # best_term から大分類・中分類を逆引き
+                hit = self._term_to_category.get(best_term)
+                if hit:
+                    large_category, medium_category = hit
+                    return {
+                        "large_category": large_category,
+                        "medium_category": medium_category,
+                        "name": item_name,
+                        "confidence": score
+                    }
             # fallback
             return self._get_fallback_result()
         except Exception as e:
@@ -859,56 +2211,64 @@ class AIEngine:
         # 基本の品名
         features.append(f"品名: {item_name}")
         
-        # 品名の長さによる特徴
-        if len(item_name) <= 5:
-            features.append("短い品名")
-        elif len(item_name) <= 10:
-            features.append("中程度の品名")
-        else:
-            features.append("長い品名")
+        # 品名の長さによる特徴（5文字以下・10文字以下・それより長い）
+        name_length = len(item_name)
+        features.append(NAME_LENGTH_FEATURES[(name_length > 5) + (name_length > 10)])
         
-        # 品名に含まれる可能性のある特徴を分析
+        # 品名に含まれる可能性のある特徴を分析（材質・色・サイズ）
         name_lower = item_name.lower()
+        features.extend(self._match_name_features(name_lower))
         
-        # 材質の特徴
-        material_keywords = {
-            "革": "革製", "皮": "革製", "leather": "革製",
-            "布": "布製", "綿": "布製", "cotton": "布製",
-            "金属": "金属製", "金": "金属製", "銀": "金属製", "metal": "金属製",
-            "プラスチック": "プラスチック製", "plastic": "プラスチック製",
-            "木": "木製", "wood": "木製", "竹": "竹製"
-        }
-        
-        for keyword, material in material_keywords.items():
-            if keyword in name_lower:
-                features.append(material)
-                break
-        
-        # 色の特徴
-        color_keywords = {
-            "黒": "黒色", "白": "白色", "赤": "赤色", "青": "青色", "緑": "緑色",
-            "黄": "黄色", "紫": "紫色", "ピンク": "ピンク色", "オレンジ": "オレンジ色",
-            "茶": "茶色", "グレー": "グレー色", "金": "金色", "銀": "銀色",
-            "black": "黒色", "white": "白色", "red": "赤色", "blue": "青色"
-        }
-        
-        for keyword, color in color_keywords.items():
-            if keyword in name_lower:
-                features.append(color)
-                break
-        
-        # サイズの特徴
-        size_keywords = {
-            "小": "小型", "大": "大型", "中": "中型",
-            "mini": "小型", "large": "大型", "small": "小型"
-        }
+        return ", ".join(features)
+
+    def _build_name_feature_automaton(self):
+        """
+        品名の属性キーワードを1つのAho-Corasickオートマトンにまとめる
         
-        for keyword, size in size_keywords.items():
-            if keyword in name_lower:
-                features.append(size)
-                break
+        Returns:
+            キーワード → (属性番号, 定義順, 特徴名)のタプルを保持するオートマトン（ahocorasick未インストール時はNone）
+        """
+        if ahocorasick is None:
+            return None
+        # 「金」「銀」のように複数の属性に属するキーワードがあるため、属性ごとのエントリをまとめて登録
+        entries: Dict[str, List[Tuple[int, int, str]]] = {}
+        for category_index, keywords in enumerate(NAME_FEATURE_KEYWORDS):
+            for order, (keyword, feature) in enumerate(keywords.items()):
+                entries.setdefault(keyword, []).append((category_index, order, feature))
+        automaton = ahocorasick.Automaton()
+        for keyword, keyword_entries in entries.items():
+            automaton.add_word(keyword, tuple(keyword_entries))
+        automaton.make_automaton()
+        return automaton
+    
+    def _match_name_features(self, name_lower: str) -> List[str]:
+        """
+        品名に含まれる属性キーワードから特徴名を抽出（属性ごとに定義順で最初のキーワードを採用）
         
-        return ", ".join(features)
+        Args:
+            name_lower: 小文字化した品名
+            
+        Returns:
+            特徴名のリスト（材質・色・サイズの順）
+        """
+        if self._name_feature_automaton is None:
+            # 全属性のキーワードを1つのループで照合し、全属性が見つかった時点で打ち切る
+            found: Dict[int, str] = {}
+            for category_index, keyword, feature in NAME_FEATURE_ENTRIES:
+                if category_index not in found and keyword in name_lower:
+                    found[category_index] = feature
+                    if len(found) == len(NAME_FEATURE_KEYWORDS):
+                        break
+            return [found[i] for i in sorted(found)]
+        
+        # 品名を1回走査し、属性ごとに定義順が最も早いキーワードを記録
+        best: Dict[int, Tuple[int, str]] = {}
+        for _, keyword_entries in self._name_feature_automaton.iter(name_lower):
+            for category_index, order, feature in keyword_entries:
+                current = best.get(category_index)
+                if current is None or order < current[0]:
+                    best[category_index] = (order, feature)
+        return [best[i][1] for i in sorted(best)]
 
     def count_cash_from_image(self, image_path: str) -> Dict:
         """
@@ -930,9 +2290,18 @@ class AIEngine:
         }
 
     def _build_classification_automaton(self):
-        """正規表現パターンを構築"""
-        keyword_map = []  # (pattern, payload, medium_category_id, orig_term)
+        """
+        分類キーワードの照合用オートマトンを構築
+        
+        Returns:
+            (Aho-Corasickオートマトン, keyword_map) のタプル。
+            オートマトンは正規化済みキーワード → keyword_mapの番号のタプルを保持する
+            （ahocorasick未インストール時はNone）
+        """
+        keyword_map = []  # (normalized_term, payload, medium_category_id, orig_term, term_length)
         classification_data = self._load_classification_data()
+        # 中分類ID → 連番（スコアを配列で集計するため）
+        medium_indices: Dict[str, int] = {}
         
         try:
             if isinstance(classification_data, list):
@@ -956,17 +2325,18 @@ class AIEngine:
                                 continue
                             
                             if term:
+                                # 重み × 優先度係数（優先度を0-1の範囲に正規化）は構築時に計算しておく
                                 payload = (
                                     large_category_id,
                                     large_category_name_ja,
                                     medium_category_id,
                                     medium_category_name_ja,
-                                    weight,
-                                    priority
+                                    weight * (priority / 100.0),
+                                    priority,
+                                    medium_indices.setdefault(medium_category_id, len(medium_indices))
                                 )
                                 normalized_term = self._normalize_text(term)
-                                pattern = re.escape(normalized_term)
-                                keyword_map.append((pattern, payload, medium_category_id, term))
+                                keyword_map.append((normalized_term, payload, medium_category_id, term, len(term)))
             else:
                 # 古い形式の分類データ（辞書形式）
                 for category in classification_data.get("categories", []):
@@ -976,21 +2346,31 @@ class AIEngine:
                         keywords = medium_category_data.get("keywords", [])
                         for keyword in keywords:
                             if isinstance(keyword, str) and keyword:
-                                payload = (large_category, large_category, medium_category, medium_category, 1.0, 50)
+                                payload = (
+                                    large_category, large_category, medium_category, medium_category, 0.5, 50,
+                                    medium_indices.setdefault(medium_category, len(medium_indices))
+                                )
                                 normalized_term = self._normalize_text(keyword)
-                                pattern = re.escape(normalized_term)
-                                keyword_map.append((pattern, payload, medium_category, keyword))
+                                keyword_map.append((normalized_term, payload, medium_category, keyword, len(keyword)))
         except Exception as e:
             logger.error(f"分類オートマトン構築エラー: {e}")
             # エラーが発生した場合は空のオートマトンを返す
-            return (re.compile(""), [])
-        
-        if keyword_map:
-            or_pattern = "|".join([p[0] for p in keyword_map])
-            compiled_pattern = re.compile(or_pattern)
-        else:
-            compiled_pattern = re.compile("")
-        return (compiled_pattern, keyword_map)
+            return (None, [])
+        
+        # 正規化後に空になるキーワードは何にでも一致してしまうため照合対象から外す
+        keyword_map = [entry for entry in keyword_map if entry[0]]
+        if ahocorasick is None or not keyword_map:
+            return (None, keyword_map)
+        
+        # 同じ正規化キーワードを持つエントリはまとめて1語として登録
+        term_indices: Dict[str, List[int]] = {}
+        for i, (normalized_term, _, _, _, _) in enumerate(keyword_map):
+            term_indices.setdefault(normalized_term, []).append(i)
+        automaton = ahocorasick.Automaton()
+        for normalized_term, indices in term_indices.items():
+            automaton.add_word(normalized_term, tuple(indices))
+        automaton.make_automaton()
+        return (automaton, keyword_map)
     
     def _normalize_text(self, text: str) -> str:
         """
@@ -1002,28 +2382,7 @@ class AIEngine:
         Returns:
             正規化されたテキスト
         """
-        if not text:
-            return ""
-        # 1. 全角英数字記号を半角に
-        text = mojimoji.zen_to_han(text, kana=False)
-        
-        #2文字に統一
-        text = text.lower()
-        
-        # 3. カタカナの長音を削除
-        text = text.replace("ー", "")
-        
-        # 4. その他の正規化ルール
-        # ヴァ行の表記統一
-        text = text.replace("ヴァ", "バ").replace("ヴィ", "ビ").replace("ヴェ", "ベ").replace("ヴォ", "ボ")
-        
-        # 濁点・半濁点の正規化（簡易的）
-        text = text.replace("゛", "").replace("゜", "")
-        
-        # 空白文字の正規化
-        text = " ".join(text.split())
-        
-        return text
+        return _normalize_classification_text(text)
     
     def classify_with_new_system(self, text: str) -> Dict:
         """
@@ -1041,13 +2400,24 @@ class AIEngine:
                 return self._get_fallback_result()
             
             # キーワードマッチング
-            for pattern, payload, medium_category_id, orig_term in self.classification_automaton[1]:
-                normalized_term = self._normalize_text(orig_term)
-                if normalized_term in normalized_text:
-                    # マッチした位置を計算
+            automaton, keyword_map = self.classification_automaton
+            if automaton is not None:
+                # テキストを1回走査して全キーワードの出現を検出し、各キーワードの最初の出現位置を記録
+                first_end_positions = {}
+                for end_index, indices in automaton.iter(normalized_text):
+                    for i in indices:
+                        first_end_positions.setdefault(i, end_index + 1)
+                # 結果の順序はキーワード定義順にそろえる
+                for i in sorted(first_end_positions):
+                    _, payload, _, orig_term, term_length = keyword_map[i]
+                    found_matches.append((first_end_positions[i], payload, orig_term, term_length))
+            else:
+                for normalized_term, payload, medium_category_id, orig_term, term_length in keyword_map:
                     start_pos = normalized_text.find(normalized_term)
-                    end_pos = start_pos + len(normalized_term)
-                    found_matches.append((end_pos, payload, orig_term))
+                    if start_pos >= 0:
+                        # マッチした位置を計算
+                        end_pos = start_pos + len(normalized_term)
+                        found_matches.append((end_pos, payload, orig_term, term_length))
             
             if not found_matches:
                 logger.debug(f"キーワードマッチが見つかりません: {text}")
@@ -1071,53 +2441,44 @@ class AIEngine:
         マッチした結果から最適な分類を選択（新しいシステム）
         
         Args:
-            matches: マッチ結果 (end_pos, payload, orig_term)
+            matches: マッチ結果 (end_pos, payload, orig_term, term_length)
             text: 正規化された入力テキスト
             
         Returns:
             最適な分類結果
         """
-        # 中分類ごとのスコアを集計
-        medium_category_scores = {}
-        
-        for end_index, (large_id, large_name, medium_id, medium_name, weight, priority), orig_term in matches:
-            # キーワードの長さを取得（より長いキーワードを優先）
-            keyword_length = len(orig_term)
-            
-            # スコア計算: 重み × キーワード長 × 優先度係数
-            priority_factor = priority / 100.0  # 優先度を0-1の範囲に正規化
-            score = weight * keyword_length * priority_factor
-            
-            if medium_id not in medium_category_scores:
-                medium_category_scores[medium_id] = {
-                    "large_category_id": large_id,
-                    "large_category_name_ja": large_name,
-                    "medium_category_id": medium_id,
-                    "medium_category_name_ja": medium_name,
-                    "total_score": 0.0,
-                    "priority": priority,
-                    "matched_keywords": []
-                }
-            
-            medium_category_scores[medium_id]["total_score"] += score
-            medium_category_scores[medium_id]["matched_keywords"].append({
-                "keyword": orig_term,
-                "score": score
-            })
-        
-        if not medium_category_scores:
+        if not matches:
             return self._get_fallback_result()
         
-        # 最適な中分類を選択
-        best_medium_id = max(
-            medium_category_scores.keys(),
-            key=lambda x: (
-                medium_category_scores[x]["total_score"],
-                medium_category_scores[x]["priority"]
-            )
+        # 中分類ごとのスコアを連番で引く配列に集計: (重み × 優先度係数) × キーワード長（より長いキーワードを優先）
+        medium_indices = np.fromiter((payload[6] for _, payload, _, _ in matches), dtype=np.intp, count=len(matches))
+        scores = np.fromiter(
+            (payload[4] * keyword_length for _, payload, _, keyword_length in matches),
+            dtype=np.float64, count=len(matches)
         )
+        total_scores = np.bincount(medium_indices, weights=scores)
         
-        best_match = medium_category_scores[best_medium_id]
+        # 最高スコアの中分類を選択（同点は優先度が高いもの、さらに同点なら先にマッチしたもの）
+        best_total = total_scores.max()
+        best_payload = None
+        for _, payload, _, _ in matches:
+            if total_scores[payload[6]] == best_total and (best_payload is None or payload[5] > best_payload[5]):
+                best_payload = payload
+        best_index = best_payload[6]
+        
+        large_id, large_name, medium_id, medium_name, _, _, _ = best_payload
+        best_match = {
+            "large_category_id": large_id,
+            "large_category_name_ja": large_name,
+            "medium_category_id": medium_id,
+            "medium_category_name_ja": medium_name,
+            "total_score": float(best_total),
+            # 選ばれた中分類のキーワードだけを取り出す
+            "matched_keywords": [
+                {"keyword": orig_term, "score": float(score)}
+                for (_, payload, orig_term, _), score in zip(matches, scores) if payload[6] == best_index
+            ]
+        }
         
         # 信頼度を計算（0-1の範囲）
         max_possible_score = 10  # 理論上の最大スコア
@@ -1170,5 +2531,29 @@ class AIEngine:
         # 簡易的な実装：マッチした部分を返す
         # より正確な実装では、オートマトンから正確なキーワードを取得する
         return text[:end_index] if end_index <= len(text) else text
-# グローバルAIエンジンインスタンス
-ai_engine = AIEngine() 
\ No newline at end of file
+# グローバルAIエンジンインスタンス（初回利用時に生成）
+_ai_engine: Optional[AIEngine] = None
+_ai_engine_lock = threading.Lock()
+
+
+def get_ai_engine() -> AIEngine:
+    """
+    グローバルAIエンジンインスタンスを取得（初回呼び出し時にモデルを読み込む）
+    
+    Returns:
+        AIEngineインスタンス
+    """
+    global _ai_engine
+    if _ai_engine is None:
+        # 同時に複数のリクエストが来てもモデルの読み込みは1回だけにする
+        with _ai_engine_lock:
+            if _ai_engine is None:
+                _ai_engine = AIEngine()
+    return _ai_engine
+
+
+def __getattr__(name: str):
+    """従来の`from app.ai_engine import ai_engine`を引き続き利用できるようにする"""
+    if name == "ai_engine":
+        return get_ai_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}") 
\ No newline at end of file
@@ -4,43 +4,49 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 import json
 import logging
+import functools
 from typing import Dict, List, Tuple, Optional
 import mojimoji
 import re
 import unicodedata
 from sudachipy import Dictionary, SplitMode
-import torch
-from transformers import AutoTokenizer, AutoModel
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from text_utils import normalize_text, get_bert_embedding
+from text_utils import normalize_text, get_bert_embedding_cached
 
-logger = logging.getLogger(__name__)
+# 複数キーワード照合用のAho-Corasick実装（未インストール時は正規表現の選択パターンで照合）
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
-# BERTモデルの初期化（グローバルで1回のみ）
-MODEL_NAME = 'cl-tohoku/bert-base-japanese-whole-word-masking'
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-model = AutoModel.from_pretrained(MODEL_NAME)
-device = "cuda" if torch.cuda.is_available() else "cpu"
-model.to(device)
+logger = logging.getLogger(__name__)
 
 # SudachiPyの辞書オブジェクトを初期化（core辞書を使用）
 tokenizer_obj = Dictionary(dict="core").create()
 
+_SPLIT_MODE = SplitMode.C
+
+@functools.lru_cache(maxsize=4096)
+def _extract_nouns_cached(text: str) -> Tuple[str, ...]:
+    """形態素解析は決定的なため、同じテキストの結果をキャッシュする（共有されるためタプルで保持）"""
+    return tuple(
+        m.dictionary_form()
+        for m in tokenizer_obj.tokenize(text, _SPLIT_MODE)
+        if m.part_of_speech()[0] == '名詞'
+    )
+
 def extract_nouns(text: str) -> list:
     """
     SudachiPyを使用してテキストから名詞の原形を抽出する。
     """
-    morphemes = tokenizer_obj.tokenize(text, SplitMode.C)
-    nouns = [m.dictionary_form() for m in morphemes if m.part_of_speech()[0] == '名詞']
-    return nouns
+    return list(_extract_nouns_cached(text))
 
 class ClassificationService:
     """
     決定論的かつ高性能な物品分類サービス
     eac_06_classification_system_design.md に基づいて実装
     - 正規化処理による表記ゆれの吸収
-    - 正規表現による高速キーワードマッチング
+    - Aho-Corasick法（未インストール時は正規表現）による高速キーワードマッチング
     - 階層的優先度システム
     """
     def __init__(self):
@@ -61,9 +67,26 @@ class ClassificationService:
         return []
 
     def _build_keyword_patterns(self):
-        """正規表現パターンを構築"""
-        keyword_map = []  # (pattern, payload, medium_category_id, orig_term)
+        """正規表現パターンを構築
+
+        キーワードの属性はキーワードIDで引く並列配列（スコア・優先度・中分類の連番はNumPy配列、文字列はリスト）に格納する
+        """
+        keyword_map = []  # (pattern, keyword_id, medium_category_id, orig_term)
         term_map = {}
+        # マッチした文字列からキーワードIDを引く辞書（同じ正規化キーワードは先に定義されたものを優先）
+        self._keyword_id_by_norm: Dict[str, int] = {}
+        # 正規化キーワード → 定義順（正規表現の選択パターンと同じく、同じ位置では先に定義されたものを優先するため）
+        term_orders: Dict[str, int] = {}
+        # 中分類ID → 連番（スコアをnp.bincountで集計するための添字）
+        medium_indices: Dict[str, int] = {}
+        keyword_scores: List[float] = []
+        keyword_priorities: List[int] = []
+        keyword_medium_indices: List[int] = []
+        self._keyword_large_ids: List[str] = []
+        self._keyword_large_names: List[str] = []
+        self._keyword_medium_ids: List[str] = []
+        self._keyword_medium_names: List[str] = []
+        self._keyword_terms: List[str] = []
         for large_category in self.classification_data:
             large_category_id = large_category.get("large_category_id", "")
             large_category_name_ja = large_category.get("large_category_name_ja", "")
@@ -75,20 +98,37 @@ class ClassificationService:
                     term = keyword_data.get("term", "")
                     weight = keyword_data.get("weight", 1.0)
                     if term:
-                        payload = (
-                            large_category_id,
-                            large_category_name_ja,
-                            medium_category_id,
-                            medium_category_name_ja,
-                            weight,
-                            priority,
-                            term
-                        )
+                        keyword_id = len(keyword_scores)
+                        # キーワードごとのスコア（重み × キーワード長 × 優先度係数）は定義だけで決まるため事前に計算
+                        priority_factor = priority / 100.0 if priority > 0 else 0.01
+                        keyword_scores.append(weight * len(term) * priority_factor)
+                        keyword_priorities.append(priority)
+                        keyword_medium_indices.append(medium_indices.setdefault(medium_category_id, len(medium_indices)))
+                        self._keyword_large_ids.append(large_category_id)
+                        self._keyword_large_names.append(large_category_name_ja)
+                        self._keyword_medium_ids.append(medium_category_id)
+                        self._keyword_medium_names.append(medium_category_name_ja)
+                        self._keyword_terms.append(term)
                         normalized_term = normalize_text(term)
                         # 正規表現パターンをエスケープして登録
                         pattern = re.escape(normalized_term)
-                        keyword_map.append((pattern, payload, medium_category_id, term))
+                        keyword_map.append((pattern, keyword_id, medium_category_id, term))
                         term_map[(normalized_term, medium_category_id)] = term
+                        self._keyword_id_by_norm.setdefault(normalized_term, keyword_id)
+                        if normalized_term:
+                            term_orders.setdefault(normalized_term, len(term_orders))
+        # スコアは合計が従来と一致するようfloat64で保持する
+        self._keyword_scores = np.asarray(keyword_scores, dtype=np.float64)
+        self._keyword_priorities = np.asarray(keyword_priorities, dtype=np.int64)
+        self._keyword_medium_indices = np.asarray(keyword_medium_indices, dtype=np.intp)
+        self._keyword_automaton = None
+        if ahocorasick is not None and term_orders:
+            automaton = ahocorasick.Automaton()
+            for normalized_term, order in term_orders.items():
+                automaton.add_word(normalized_term, (order, len(normalized_term), self._keyword_id_by_norm[normalized_term]))
+            automaton.make_automaton()
+            self._keyword_automaton = automaton
+            return (None, keyword_map), term_map
         # すべてのキーワードを|で連結したパターンを作成
         if keyword_map:
             or_pattern = "|".join([p[0] for p in keyword_map])
@@ -104,14 +144,15 @@ class ClassificationService:
         try:
             normalized_text = normalize_text(text)
             found_matches = []
-            # 正規表現で全キーワードを一括検索
-            for match in self.keyword_patterns[0].finditer(normalized_text):
-                matched_str = match.group(0)
-                # payloadを特定
-                for pattern, payload, medium_category_id, orig_term in self.keyword_patterns[1]:
-                    if matched_str == re.escape(normalize_text(orig_term)):
-                        found_matches.append((match.end(), payload))
-                        break
+            if self._keyword_automaton is not None:
+                found_matches = self._find_keyword_matches(normalized_text)
+            else:
+                # 正規表現で全キーワードを一括検索
+                for match in self.keyword_patterns[0].finditer(normalized_text):
+                    # キーワードIDを特定
+                    keyword_id = self._keyword_id_by_norm.get(match.group(0))
+                    if keyword_id is not None:
+                        found_matches.append((match.end(), keyword_id))
             if not found_matches:
                 return self._get_fallback_result()
             best_match = self._select_best_match(found_matches, normalized_text)
@@ -120,47 +161,65 @@ class ClassificationService:
             logger.error(f"分類処理エラー: {e}")
             return self._get_fallback_result()
 
-    def _select_best_match(self, matches: List[Tuple[int, tuple]], text: str) -> Dict:
+    def _find_keyword_matches(self, normalized_text: str) -> List[Tuple[int, int]]:
+        """
+        Aho-Corasickオートマトンでテキストを1回走査してキーワードを検出
+        
+        正規表現の選択パターンのfinditerと同じ結果になるよう、左から順に重ならないマッチを採用し、
+        同じ位置から始まるキーワードは先に定義されたものを優先する
+        
+        Args:
+            normalized_text: 正規化済みのテキスト
+            
+        Returns:
+            (マッチの終了位置, キーワードID)のリスト
+        """
+        hits = sorted(
+            (end_index - term_length + 1, order, end_index + 1, keyword_id)
+            for end_index, (order, term_length, keyword_id) in self._keyword_automaton.iter(normalized_text)
+        )
+        found_matches = []
+        position = 0
+        for start, _, end, keyword_id in hits:
+            if start >= position:
+                found_matches.append((end, keyword_id))
+                position = end
+        return found_matches
+
+    def _select_best_match(self, matches: List[Tuple[int, int]], text: str) -> Dict:
         """マッチした結果から最適な分類を選択"""
-        medium_category_scores = {}
-        for end_index, (large_id, large_name, medium_id, medium_name, weight, priority, orig_term) in matches:
-            keyword_length = len(orig_term)
-            priority_factor = priority / 100.0 if priority > 0 else 0.01
-            score = weight * keyword_length * priority_factor
-            if medium_id not in medium_category_scores:
-                medium_category_scores[medium_id] = {
-                    "large_category_id": large_id,
-                    "large_category_name_ja": large_name,
-                    "medium_category_id": medium_id,
-                    "medium_category_name_ja": medium_name,
-                    "total_score": 0.0,
-                    "priority": priority,
-                    "matched_keywords": []
-                }
-            medium_category_scores[medium_id]["total_score"] += score
-            medium_category_scores[medium_id]["matched_keywords"].append({
-                "keyword": orig_term,
-                "score": score
-            })
-        if not medium_category_scores:
+        if not matches:
             return self._get_fallback_result()
-        best_medium_id = max(
-            medium_category_scores.keys(),
-            key=lambda x: (
-                medium_category_scores[x]["total_score"],
-                medium_category_scores[x]["priority"]
-            )
-        )
-        best_match = medium_category_scores[best_medium_id]
+        # 事前計算済みのキーワードスコアを中分類の連番ごとに一括集計
+        keyword_ids = np.fromiter((keyword_id for _, keyword_id in matches), dtype=np.intp, count=len(matches))
+        medium_indices = self._keyword_medium_indices[keyword_ids]
+        total_scores = np.bincount(medium_indices, weights=self._keyword_scores[keyword_ids])
+        # 最高スコアの中分類を選択（同点は優先度が高いもの、さらに同点なら先にマッチしたもの）
+        best_total = total_scores.max()
+        best_id = None
+        seen = set()
+        for keyword_id, medium_index in zip(keyword_ids.tolist(), medium_indices.tolist()):
+            if medium_index in seen:
+                continue
+            seen.add(medium_index)
+            if total_scores[medium_index] == best_total and (
+                best_id is None or self._keyword_priorities[keyword_id] > self._keyword_priorities[best_id]
+            ):
+                best_id = keyword_id
+        best_index = self._keyword_medium_indices[best_id]
         max_possible_score = 10  # 必要に応じて調整
-        confidence = min(best_match["total_score"] / max_possible_score, 1.0)
+        confidence = min(float(best_total) / max_possible_score, 1.0)
         return {
-            "large_category_id": best_match["large_category_id"],
-            "large_category_name_ja": best_match["large_category_name_ja"],
-            "medium_category_id": best_match["medium_category_id"],
-            "medium_category_name_ja": best_match["medium_category_name_ja"],
+            "large_category_id": self._keyword_large_ids[best_id],
+            "large_category_name_ja": self._keyword_large_names[best_id],
+            "medium_category_id": self._keyword_medium_ids[best_id],
+            "medium_category_name_ja": self._keyword_medium_names[best_id],
             "confidence": round(confidence, 2),
-            "matched_keywords": best_match["matched_keywords"]
+            # 選ばれた中分類のキーワードだけを取り出す
+            "matched_keywords": [
+                {"keyword": self._keyword_terms[keyword_id], "score": float(self._keyword_scores[keyword_id])}
+                for keyword_id in keyword_ids[medium_indices == best_index].tolist()
+            ]
         }
 
     def _get_fallback_result(self) -> Dict:
@@ -179,27 +238,91 @@ class ClassificationService:
         return self.classification_data
     
 class SemanticClassifier:
-    def __init__(self, precomputed_vectors_path: str):
-        """分類器を初期化し、事前計算済みベクトルをロードする。"""
+    def __init__(self, precomputed_vectors_path: str, categories_path: str, legacy_archive_path: Optional[str] = None):
+        """分類器を初期化し、事前計算済みベクトルをロードする。
+
+        Args:
+            precomputed_vectors_path: 事前計算済みカテゴリベクトル（.npy）のパス
+            categories_path: ベクトルと同じ順序のカテゴリ名（.npy）のパス
+            legacy_archive_path: .npyが無い場合に読み込む旧形式（categoriesとvectorsを含む.npz）のパス
+        """
+        self.categories = np.array([])
+        self.category_vectors = np.array([])
         try:
-            data = np.load(precomputed_vectors_path)
-            self.categories = data['categories']
-            self.category_vectors = data['vectors']
-        except FileNotFoundError:
-            print(f"Error: Pre-computed vectors file not found at {precomputed_vectors_path}")
-            self.categories = np.array([])
-            self.category_vectors = np.array([])
+            if os.path.exists(precomputed_vectors_path) and os.path.exists(categories_path):
+                categories = np.load(categories_path)
+                # 全体をメモリへコピーせず、メモリマップで必要なページだけOSに読み込ませる
+                vectors = np.load(precomputed_vectors_path, mmap_mode='r')
+            elif legacy_archive_path and os.path.exists(legacy_archive_path):
+                logger.warning(
+                    f"旧形式のカテゴリベクトルを読み込みます: {legacy_archive_path}"
+                    "（precompute_category_vectors.py を再実行すると.npy形式で保存されます）"
+                )
+                with np.load(legacy_archive_path) as data:
+                    categories = data['categories']
+                    vectors = data['vectors']
+            else:
+                logger.error(
+                    f"事前計算済みカテゴリベクトルが見つかりません: {precomputed_vectors_path}"
+                    "（precompute_category_vectors.py を実行してください）"
+                )
+                return
+            if vectors.ndim != 2 or len(vectors) != len(categories):
+                logger.error(
+                    f"カテゴリベクトルの形状が不正です: {vectors.shape}（カテゴリ数: {len(categories)}）"
+                    "（precompute_category_vectors.py を再実行してください）"
+                )
+                return
+            self.categories = categories
+            self.category_vectors = self._normalized_vectors(vectors)
+        except Exception as e:
+            logger.error(f"カテゴリベクトルの読み込みに失敗: {e}（precompute_category_vectors.py を再実行してください）")
+
+    @staticmethod
+    def _normalized_vectors(vectors: np.ndarray) -> np.ndarray:
+        """L2正規化済みのfloat32行列を返す（正規化済みのfloat32ならメモリマップのまま使い、それ以外は変換・正規化する）"""
+        norms = np.linalg.norm(np.asarray(vectors, dtype=np.float32), axis=1, keepdims=True)
+        if vectors.dtype == np.float32 and np.allclose(norms[norms > 0], 1.0, atol=1e-3):
+            return vectors
+        # float32以外、または正規化されていない場合はメモリ上でL2正規化する（ゼロベクトルはそのまま）
+        norms[norms == 0] = 1.0
+        return np.ascontiguousarray(np.asarray(vectors, dtype=np.float32) / norms)
 
     def suggest_categories(self, user_input: str, top_n: int = 5):
         """ユーザー入力に基づいて、意味的に類似したカテゴリを提案する。"""
         if self.category_vectors.size == 0:
             return []
         normalized_input = normalize_text(user_input)
-        input_vector = get_bert_embedding(normalized_input)
-        similarities = cosine_similarity(input_vector.reshape(1, -1), self.category_vectors).flatten()
-        top_n_indices = np.argsort(similarities)[-top_n:][::-1]
+        # 同じ入力のBERTベクトルは再計算しない（正規化済みテキストをキーにキャッシュされる）
+        input_vector = get_bert_embedding_cached(normalized_input)
+        # 正規化済みのカテゴリベクトルとの内積1回でコサイン類似度を計算
+        query = np.asarray(input_vector, dtype=np.float32).ravel()
+        query_norm = np.linalg.norm(query)
+        if query_norm > 0:
+            query = query / query_norm
+        similarities = self.category_vectors @ query
+        if 0 < top_n < len(similarities):
+            # 全件ソートせず、上位top_n件を部分選択してからその中だけを並べ替える
+            top_n_indices = np.argpartition(similarities, -top_n)[-top_n:]
+            top_n_indices = top_n_indices[np.argsort(-similarities[top_n_indices])]
+        else:
+            top_n_indices = np.argsort(similarities)[-top_n:][::-1]
         suggestions = [(self.categories[i], float(similarities[i])) for i in top_n_indices]
         return suggestions
 
-# グローバル分類サービスインスタンス
-classification_service = ClassificationService() 
\ No newline at end of file
+@functools.lru_cache(maxsize=None)
+def get_classification_service() -> ClassificationService:
+    """
+    グローバル分類サービスインスタンスを取得（インポート時ではなく初回呼び出し時に生成する）
+    
+    Returns:
+        ClassificationServiceインスタンス
+    """
+    return ClassificationService()
+
+
+def __getattr__(name: str):
+    """従来の`from app.classification_service import classification_service`を引き続き利用できるようにする"""
+    if name == "classification_service":
+        return get_classification_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}") 
\ No newline at end of file
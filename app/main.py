@@ -7,21 +7,26 @@ if vendor_path not in sys.path:
     sys.path.insert(0, vendor_path)
 
 from fastapi import FastAPI, Depends, HTTPException, File, UploadFile, Query, Request
+from sqlalchemy import func, and_, or_, select, text
 from sqlalchemy.orm import Session
 from typing import List, Dict, Optional
 from pydantic import BaseModel
-from app.database import SessionLocal
+from app.database import SessionLocal, DB_POOL_SIZE, DB_MAX_OVERFLOW
 from app.models import Item, Facility
-from app.ai_engine import ai_engine
+from app.ai_engine import get_ai_engine
 from app.security import security_manager
 from app.logging_config import logging_config
 import mojimoji
 import bcrypt
 import math
+import numpy as np
 import tempfile
+import shutil
 import time
 from fastapi.middleware.cors import CORSMiddleware
 import uuid
+import anyio
+from contextlib import asynccontextmanager
 from fastapi.staticfiles import StaticFiles
 from datetime import timezone, timedelta, datetime
 
@@ -38,10 +43,26 @@ static_path = os.path.join(os.path.dirname(base_path), 'static')
 if not os.path.exists(static_path):
     os.makedirs(static_path, exist_ok=True)
 
+# 同期エンドポイント（def）を実行するスレッドプールの上限
+# DB接続の上限（pool_size + max_overflow）に合わせ、接続待ちのスレッドや空いたままの接続を作らないようにする
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+
+# セマンティック検索（PostgreSQL）でHNSWインデックスから取り出す候補数の倍率（条件で除外される分を見込んで limit の何倍か）
+SEMANTIC_CANDIDATE_FACTOR = 10
+# hnsw.ef_search に設定できる上限（候補数がこれを超える場合はインデックスを使わず正確に並べる）
+HNSW_EF_SEARCH_MAX = 1000
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # DB・AI処理は同期エンドポイントとしてスレッドプールで実行されるため、イベントループは塞がない
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    yield
+
 app = FastAPI(
     title="拾得物管理システム API",
     description="AI技術を活用した拾得物管理システムのAPI",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS設定
@@ -133,17 +154,17 @@ def get_db():
 def read_root():
     return {"message": "Lost Items API サーバー起動中"}
 
-@app.post("/items", response_model=ItemRead)
-def create_item(item: ItemCreate, db: Session = Depends(get_db)):
+def _new_item(item: ItemCreate, vector: List[float], db: Session) -> Item:
+    """受付日時から管理番号・保管場所を決めて、登録用のItemを作成"""
     # 同日の通し番号を取得
     dt = datetime.fromisoformat(item.accepted_datetime)
     ymd = dt.strftime("%y-%m-%d")
     
-    # 同日のアイテム数を取得して通し番号を生成
-    today_items = db.query(Item).filter(
+    # 同日のアイテム数を取得して通し番号を生成（保管箱番号の計算にも使う。受付日時のインデックスで範囲検索）
+    today_items = db.query(func.count(Item.item_id)).filter(
         Item.accepted_datetime >= dt.replace(hour=0, minute=0, second=0, microsecond=0).isoformat(),
         Item.accepted_datetime < dt.replace(hour=23, minute=59, second=59, microsecond=999999).isoformat()
-    ).count()
+    ).scalar()
     
     sequence_number = str(today_items + 1).zfill(4)  # 4桁のゼロパディング
     item_id = f"{ymd}-{sequence_number}"
@@ -156,22 +177,14 @@ def create_item(item: ItemCreate, db: Session = Depends(get_db)):
     elif item.category_large == "食料品類":
         storage_location = f"{ymd}-冷蔵庫"
     else:
-        # 同日の拾得物数を取得して保管箱番号を計算
-        today_items = db.query(Item).filter(
-            Item.accepted_datetime >= dt.replace(hour=0, minute=0, second=0, microsecond=0).isoformat(),
-            Item.accepted_datetime < dt.replace(hour=23, minute=59, second=59, microsecond=999999).isoformat()
-        ).count()
-        
-        # 20個ごとに保管箱番号をインクリメント
+        # 同日の拾得物数から保管箱番号を計算（20個ごとに保管箱番号をインクリメント）
         storage_box_number = str((today_items // 20) + 1).zfill(2)
         storage_location = f"{ymd}-{storage_box_number}"
 
     JST = timezone(timedelta(hours=9))
     now = datetime.now(JST).isoformat()
 
-    # AIエンジンを使用してベクトル生成
-    vector = ai_engine.generate_vector(f"{item.name} {item.features}")
-    db_item = Item(
+    return Item(
         item_id=item_id,
         storage_location=storage_location,
         vector=vector,  # ベクトルを追加
@@ -179,15 +192,112 @@ def create_item(item: ItemCreate, db: Session = Depends(get_db)):
         updated_at=now,
         **item.dict()
     )
+
+@app.post("/items", response_model=ItemRead)
+def create_item(item: ItemCreate, db: Session = Depends(get_db)):
+    # AIエンジンを使用してベクトル生成
+    vector = get_ai_engine().generate_vector_list(f"{item.name} {item.features}")
+    db_item = _new_item(item, vector, db)
     db.add(db_item)
     db.commit()
     db.refresh(db_item)
     return db_item
 
+@app.post("/items/bulk", response_model=List[ItemRead])
+def create_items(items: List[ItemCreate], db: Session = Depends(get_db)):
+    # 全アイテムのベクトルを1回のバッチ推論で生成
+    vectors = get_ai_engine().generate_vectors([f"{item.name} {item.features}" for item in items])
+    db_items = []
+    for item, vector in zip(items, vectors):
+        db_item = _new_item(item, vector.tolist(), db)
+        db.add(db_item)
+        # 同日の通し番号・保管箱番号の計算に、このリクエストで追加したアイテムも含める
+        db.flush()
+        db_items.append(db_item)
+    db.commit()
+    for db_item in db_items:
+        db.refresh(db_item)
+    return db_items
+
 @app.get("/items", response_model=List[ItemRead])
 def list_items(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     return db.query(Item).order_by(Item.created_at.desc()).offset(skip).limit(limit).all()
 
+# /items/{item_id} より前に定義し、"search" がアイテムIDとして扱われないようにする
+@app.get("/items/search", response_model=List[ItemRead])
+def search_items(
+    keywords: str = Query(None, description="品名・特徴のANDキーワード（スペース区切り）"),
+    found_place: str = Query(None, description="拾得場所"),
+    date_from: str = Query(None, description="拾得日(開始)"),
+    date_to: str = Query(None, description="拾得日(終了)"),
+    semantic_search: bool = Query(False, description="セマンティック検索有効化"),
+    limit: Optional[int] = Query(None, ge=1, description="最大件数（セマンティック検索時は類似度の上位から）"),
+    db: Session = Depends(get_db)
+):
+    query = db.query(Item)
+    # ANDキーワード検索（1つの条件式にまとめ、大文字・小文字を区別しない。PostgreSQLではトライグラムのGINインデックスを使用）
+    keyword_terms = keywords.split() if keywords else []
+    if keyword_terms:
+        query = query.filter(and_(*[
+            or_(Item.name.ilike(f"%{kw}%"), Item.features.ilike(f"%{kw}%"))
+            for kw in keyword_terms
+        ]))
+    if found_place:
+        query = query.filter(Item.found_place.contains(found_place))
+    if date_from:
+        query = query.filter(Item.found_datetime >= date_from)
+    if date_to:
+        query = query.filter(Item.found_datetime <= date_to)
+    
+    # セマンティック検索が有効な場合、ベクトル類似度でランキング
+    if semantic_search and keywords:
+        # クエリをベクトル化
+        query_vector = get_ai_engine().generate_vector(keywords)
+        if db.bind.dialect.name == "postgresql" and query_vector.any():
+            # PostgreSQL（pgvector）側でコサイン距離順に並べ、必要な件数だけ取得する
+            distance = Item.vector.cosine_distance(query_vector.tolist())
+            candidate_count = limit * SEMANTIC_CANDIDATE_FACTOR if limit else 0
+            if 0 < candidate_count <= HNSW_EF_SEARCH_MAX:
+                # HNSWインデックスで距離の近い順に候補を取り出してから条件で絞り込む
+                # （インデックスの走査は hnsw.ef_search 件までしか返さないため、このトランザクションだけ候補数まで引き上げる）
+                db.execute(
+                    text("SELECT set_config('hnsw.ef_search', :ef_search, true)"),
+                    {"ef_search": str(candidate_count)}
+                )
+                candidate_ids = db.query(Item.item_id).order_by(distance).limit(candidate_count).subquery()
+                # 候補は高々 candidate_count 件のため、距離に0を足してインデックスを使わせず正確な距離で並べ替える
+                items = (
+                    query.filter(Item.item_id.in_(select(candidate_ids.c.item_id)))
+                    .order_by(distance + 0)
+                    .limit(limit)
+                    .all()
+                )
+                if len(items) == limit:
+                    return items
+                # 条件で除外されて候補内に limit 件そろわない場合は、絞り込んだ全行を並べ直す
+            # 絞り込んだ行を正確な距離で並べる（インデックスの走査では ef_search 件で打ち切られ件数が不足するため、距離に0を足して使わせない）
+            # （ベクトルのないアイテムは距離がNULLになり末尾に並ぶ）
+            query = query.order_by(distance + 0)
+            if limit:
+                query = query.limit(limit)
+            return query.all()
+        
+        # その他のDBでは全アイテムとの類似度を1回の行列ベクトル積で計算してランキング（ベクトルのないアイテムは類似度0）
+        # 更新日時が変わっていないアイテムは、正規化済みベクトルをAIエンジンのキャッシュから再利用する
+        items = query.all()
+        similarities = get_ai_engine().calculate_similarities(
+            query_vector,
+            [item.vector for item in items],
+            [(item.item_id, item.updated_at) for item in items]
+        )
+        # 類似度で降順ソート（同点は元の順序を維持）
+        order = np.argsort(-similarities, kind="stable")
+        return [items[i] for i in order[:limit]]
+    
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
 @app.get("/items/{item_id}", response_model=ItemRead)
 def get_item(item_id: str, db: Session = Depends(get_db)):
     item = db.query(Item).filter(Item.item_id == item_id).first()
@@ -223,20 +333,21 @@ def recognize_item(file: UploadFile = File(..., description="画像ファイル"
     
     # 一時ファイルに保存
     with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp_file:
-        content = file.file.read()
-        temp_file.write(content)
+        # アップロード内容を丸ごとメモリに読み込まず、64KBずつファイルへ書き出す
+        shutil.copyfileobj(file.file, temp_file, length=65536)
+        file_size = temp_file.tell()
         temp_file_path = temp_file.name
     
     try:
         # ファイル検証
-        validation_result = security_manager.validate_file_upload(temp_file_path, len(content))
+        validation_result = security_manager.validate_file_upload(temp_file_path, file_size)
         if not validation_result["valid"]:
             raise HTTPException(status_code=400, detail=validation_result["message"])
         
         # AIエンジンで画像認識（タイムアウト処理付き）
         start_time = time.time()
         try:
-            result = ai_engine.recognize_item(temp_file_path)
+            result = get_ai_engine().recognize_item(temp_file_path)
             duration = time.time() - start_time
             
             # AI操作ログ
@@ -244,7 +355,7 @@ def recognize_item(file: UploadFile = File(..., description="画像ファイル"
                 operation="image_recognition",
                 duration=duration,
                 success=True,
-                details={"file_size": len(content), "mime_type": validation_result["mime_type"]}
+                details={"file_size": file_size, "mime_type": validation_result["mime_type"]}
             )
             
         except Exception as e:
@@ -270,6 +381,74 @@ def recognize_item(file: UploadFile = File(..., description="画像ファイル"
         if os.path.exists(temp_file_path):
             os.unlink(temp_file_path)
 
+@app.post("/recognize/batch", response_model=List[RecognizeResponse])
+def recognize_items(files: List[UploadFile] = File(..., description="画像ファイル（複数）")):
+    # 一時ファイルに保存し、まとめて検証
+    # ファイル数チェック（一度に大量の画像を推論させない）
+    if len(files) > security_manager.max_batch_files:
+        raise HTTPException(
+            status_code=400,
+            detail=f"ファイル数が多すぎます（最大{security_manager.max_batch_files}件）"
+        )
+    
+    temp_file_paths = []
+    try:
+        for file in files:
+            # ファイルサイズチェック
+            if file.size > security_manager.max_file_size:
+                raise HTTPException(status_code=400, detail="ファイルサイズが大きすぎます")
+            
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp_file:
+                shutil.copyfileobj(file.file, temp_file, length=65536)
+                file_size = temp_file.tell()
+                temp_file_paths.append(temp_file.name)
+            
+            # ファイル検証
+            validation_result = security_manager.validate_file_upload(temp_file.name, file_size)
+            if not validation_result["valid"]:
+                raise HTTPException(status_code=400, detail=validation_result["message"])
+        
+        # AIエンジンで画像認識（YOLO・OCRをバッチ推論）
+        start_time = time.time()
+        try:
+            results = get_ai_engine().recognize_items(temp_file_paths)
+            duration = time.time() - start_time
+            
+            # AI操作ログ
+            logging_config.log_ai_operation(
+                operation="image_recognition_batch",
+                duration=duration,
+                success=True,
+                details={"file_count": len(temp_file_paths)}
+            )
+            
+        except Exception as e:
+            duration = time.time() - start_time
+            logging_config.log_ai_operation(
+                operation="image_recognition_batch",
+                duration=duration,
+                success=False,
+                details={"error": str(e)}
+            )
+            raise HTTPException(status_code=500, detail="画像認識に失敗しました")
+        
+        return [
+            RecognizeResponse(
+                category_large=result["category_large"],
+                category_medium=result["category_medium"],
+                name=result["name"],
+                features=result["features"],
+                color=result["color"],
+                confidence=result["confidence"]
+            )
+            for result in results
+        ]
+    finally:
+        # 一時ファイルを削除
+        for temp_file_path in temp_file_paths:
+            if os.path.exists(temp_file_path):
+                os.unlink(temp_file_path)
+
 @app.post("/auth/token", response_model=TokenResponse)
 def auth_token(request: TokenRequest, db: Session = Depends(get_db)):
     # 入力サニタイズ
@@ -309,59 +488,9 @@ def auth_token(request: TokenRequest, db: Session = Depends(get_db)):
         token_type="bearer"
     )
 
-def calculate_similarity(vec1: List[float], vec2: List[float]) -> float:
-    # AIエンジンを使用して類似度計算
-    return ai_engine.calculate_similarity(vec1, vec2)
-
-@app.get("/items/search", response_model=List[ItemRead])
-def search_items(
-    keywords: str = Query(None, description="品名・特徴のANDキーワード（スペース区切り）"),
-    found_place: str = Query(None, description="拾得場所"),
-    date_from: str = Query(None, description="拾得日(開始)"),
-    date_to: str = Query(None, description="拾得日(終了)"),
-    semantic_search: bool = Query(False, description="セマンティック検索有効化"),
-    db: Session = Depends(get_db)
-):
-    query = db.query(Item)
-    # ANDキーワード検索
-    if keywords:
-        for kw in keywords.split():
-            query = query.filter(
-                (Item.name.contains(kw)) | (Item.features.contains(kw))
-            )
-    if found_place:
-        query = query.filter(Item.found_place.contains(found_place))
-    if date_from:
-        query = query.filter(Item.found_datetime >= date_from)
-    if date_to:
-        query = query.filter(Item.found_datetime <= date_to)
-    
-    items = query.all()
-    
-    # セマンティック検索が有効な場合、ベクトル類似度でランキング
-    if semantic_search and keywords:
-        # クエリをベクトル化
-        query_vector = ai_engine.generate_vector(keywords)
-        # 類似度を計算してランキング
-        items_with_similarity = []
-        for item in items:
-            if item.vector:
-                similarity = calculate_similarity(query_vector, item.vector)
-                items_with_similarity.append((item, similarity))
-            else:
-                items_with_similarity.append((item, 0.0))
-        # 類似度で降順ソート
-        items_with_similarity.sort(key=lambda x: x[1], reverse=True)
-        return [item for item, _ in items_with_similarity]
-    
-    return items
-
 @app.post("/items/{item_id}/image")
 def upload_item_image(item_id: str, file: UploadFile = File(...), db: Session = Depends(get_db)):
     # 画像ファイルを保存（static/images/ ディレクトリに保存）
-    import os
-    from datetime import datetime
-
     # 保存先ディレクトリ
     save_dir = "static/images"
     os.makedirs(save_dir, exist_ok=True)
@@ -395,7 +524,7 @@ def upload_item_image(item_id: str, file: UploadFile = File(...), db: Session =
     file_path = os.path.join(save_dir, filename)
 
     with open(file_path, "wb") as f:
-        f.write(file.file.read())
+        shutil.copyfileobj(file.file, f, length=65536)
 
     # 画像URLをDBに保存
     image_url = f"/static/images/{filename}"
@@ -429,7 +558,7 @@ def suggest_category(request: Dict[str, str]):
             }
         
         # AIエンジンを使用して分類提案
-        result = ai_engine.suggest_category_by_name(item_name)
+        result = get_ai_engine().suggest_category_by_name(item_name)
         
         return {
             "category_large": result.get("large_category", "その他"),
@@ -458,16 +587,13 @@ def count_cash(file: UploadFile = File(...)):
     財布内現金カウントAPI
     画像から日本の紙幣・硬貨の枚数を推定
     """
-    import tempfile
-    import os
     temp_file_path = None
     try:
         with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp_file:
-            content = file.file.read()
-            temp_file.write(content)
+            shutil.copyfileobj(file.file, temp_file, length=65536)
             temp_file_path = temp_file.name
         # AIエンジンで現金カウント
-        result = ai_engine.count_cash_from_image(temp_file_path)
+        result = get_ai_engine().count_cash_from_image(temp_file_path)
         return result
     except Exception as e:
         return {"error": str(e)}
@@ -512,10 +638,13 @@ if __name__ == "__main__":
     update_storage_location_for_expired_items(db)
     db.close()
 
+    # uvicorn[standard]がインストールされていれば、イベントループにuvloop、HTTPパーサーにhttptoolsが使われる
+    # 複数コアで並列処理する場合は WEB_CONCURRENCY でワーカープロセス数を指定する（各ワーカーがモデルを読み込むためメモリに注意）
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=8000,
         reload=False,
-        log_level="info"
+        log_level="info",
+        workers=int(os.getenv("WEB_CONCURRENCY", "1"))
     )
\ No newline at end of file
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, String, Integer, Boolean, Date, Float
+from sqlalchemy import Column, String, Integer, Boolean, Date
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.dialects.postgresql import ARRAY
+from pgvector.sqlalchemy import Vector
 
 Base = declarative_base()
 
@@ -14,7 +14,7 @@ class Item(Base):
     claims_ownership = Column(Boolean, nullable=False, default=False, comment="所有権主張")
     claims_reward = Column(Boolean, nullable=False, default=False, comment="報労金請求")
     found_datetime = Column(String, nullable=False, comment="拾得日時（TIMESTAMP WITH TIME ZONE）")
-    accepted_datetime = Column(String, nullable=False, comment="受付日時（TIMESTAMP WITH TIME ZONE）")
+    accepted_datetime = Column(String, nullable=False, index=True, comment="受付日時（TIMESTAMP WITH TIME ZONE）")
     found_place = Column(String(255), nullable=False, comment="拾得場所")
     name = Column(String(255), nullable=False, comment="品名")
     features = Column(String, nullable=False, comment="特徴")
@@ -25,7 +25,7 @@ class Item(Base):
     finder_type = Column(String(50), nullable=False, comment="拾得者の属性（第三者、施設占有者）")
     created_at = Column(String, nullable=False, comment="作成日時（TIMESTAMP WITH TIME ZONE）")
     updated_at = Column(String, nullable=False, comment="更新日時（TIMESTAMP WITH TIME ZONE）")
-    vector = Column(ARRAY(Float), nullable=True, comment="品名・特徴の埋め込みベクトル（セマンティック検索用）")
+    vector = Column(Vector(384), nullable=True, comment="品名・特徴の埋め込みベクトル（セマンティック検索用、pgvector）")
     expiry_date = Column(String, nullable=True, comment="消費期限（TIMESTAMP WITH TIME ZONE）")
     storage_period = Column(String, nullable=True, comment="保管期間（例: 90日）")
     # TODO: TIMESTAMP型は実際のDB接続時にDateTime型へ修正
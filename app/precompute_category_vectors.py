@@ -4,11 +4,13 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 import json
 import numpy as np
-from tqdm import tqdm
-from text_utils import normalize_text, get_bert_embedding
+from text_utils import normalize_text, get_bert_embeddings_batch
 
-def precompute_category_vectors(json_path: str, output_path: str):
-    """item_classification.jsonからカテゴリベクトルを事前計算し保存する。"""
+def precompute_category_vectors(json_path: str, vectors_path: str, categories_path: str):
+    """item_classification.jsonからカテゴリベクトルを事前計算し保存する。
+
+    読み込み側でメモリマップできるよう、ベクトルとカテゴリ名は別々の.npyファイルに保存する。
+    """
     with open(json_path, 'r', encoding='utf-8') as f:
         data = json.load(f)
 
@@ -21,19 +23,25 @@ def precompute_category_vectors(json_path: str, output_path: str):
                 if term:
                     categories.append(term)
 
-    category_vectors = []
     print(f"Pre-computing vectors for {len(categories)} categories...")
-    for category in tqdm(categories):
-        normalized_category = normalize_text(category)
-        vector = get_bert_embedding(normalized_category)
-        category_vectors.append(vector)
+    # 1件ずつではなくバッチ推論でまとめてベクトル化する
+    normalized_categories = [normalize_text(category) for category in categories]
+    vectors = get_bert_embeddings_batch(normalized_categories)
+
+    # L2正規化したfloat32で保存する（読み込み側で変換・コピーせずにそのまま行列積に使えるようにする）
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors = np.ascontiguousarray(vectors / norms, dtype=np.float32)
 
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    np.savez(output_path, categories=np.array(categories), vectors=np.array(category_vectors))
-    print(f"Saved pre-computed vectors to {output_path}")
+    for path in (vectors_path, categories_path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.save(vectors_path, vectors)
+    np.save(categories_path, np.array(categories))
+    print(f"Saved pre-computed vectors to {vectors_path} and {categories_path}")
 
 if __name__ == "__main__":
     precompute_category_vectors(
         json_path="frontend/public/item_classification.json",
-        output_path="data/category_vectors.npz"
+        vectors_path="data/category_vectors.npy",
+        categories_path="data/categories.npy"
     )
@@ -30,6 +30,9 @@ class SecurityManager:
         # ファイルサイズ制限（10MB）
         self.max_file_size = 10 * 1024 * 1024
         
+        # 一括認識で受け付ける最大ファイル数
+        self.max_batch_files = 20
+        
         # 危険なファイルパターン
         self.dangerous_patterns = [
             r'\.(exe|bat|cmd|com|pif|scr|vbs|js|jar|msi|dll|sys)$',
@@ -1,34 +1,161 @@
+import functools
+import hashlib
+import logging
+import os
 import unicodedata
 import re
+import threading
 import mojimoji
-import torch
-from transformers import AutoTokenizer, AutoModel
 import numpy as np
+from typing import List, Optional
 
-# 正規化関数
+logger = logging.getLogger(__name__)
+
+# 正規化で使う変換表・パターン（呼び出しごとに作り直さないようモジュール読み込み時に用意）
+_WAVE_DASH_TABLE = str.maketrans({'〜': '～'})
+_LONG_VOWEL_TABLE = str.maketrans('', '', 'ー')
+_VU_PATTERN = re.compile('ヴ([ァィェォ])')
+_VU_REPLACEMENTS = {'ァ': 'バ', 'ィ': 'ビ', 'ェ': 'ベ', 'ォ': 'ボ'}
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+def _replace_vu(match) -> str:
+    return _VU_REPLACEMENTS[match.group(1)]
+
+# 正規化関数（同じ品名・キーワードが繰り返し渡されるため結果をキャッシュ）
+@functools.lru_cache(maxsize=8192)
 def normalize_text(text: str) -> str:
     if not text:
         return ""
-    text = text.replace('〜', '～')
+    if text.isascii():
+        # ASCIIのみの文字列はNFKC・全角半角変換・長音/ヴの置換がすべて無変換になるため省略する
+        return _WHITESPACE_PATTERN.sub(' ', text.lower()).strip()
+    text = text.translate(_WAVE_DASH_TABLE)
     text = unicodedata.normalize('NFKC', text)
     text = mojimoji.zen_to_han(text, kana=False)
     text = text.lower()
-    text = text.replace('ー', '')
-    text = text.replace('ヴァ', 'バ').replace('ヴィ', 'ビ').replace('ヴェ', 'ベ').replace('ヴォ', 'ボ')
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = text.translate(_LONG_VOWEL_TABLE)
+    text = _VU_PATTERN.sub(_replace_vu, text)
+    text = _WHITESPACE_PATTERN.sub(' ', text).strip()
     return text
 
 # BERTベクトル化
 MODEL_NAME = 'cl-tohoku/bert-base-japanese-whole-word-masking'
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-model = AutoModel.from_pretrained(MODEL_NAME)
-device = "cuda" if torch.cuda.is_available() else "cpu"
-model.to(device)
+# BERTベクトルの次元（ディスクキャッシュの検証にモデルを読み込まずに使う）
+BERT_HIDDEN_SIZE = 768
 
-def get_bert_embedding(text: str) -> np.ndarray:
+# BERTモデル（インポート時ではなく、初回のベクトル化で読み込む）
+_bert = None
+_bert_lock = threading.Lock()
+
+def _get_bert():
+    """BERTのトークナイザー・モデル・デバイスを取得（初回呼び出し時に読み込む）"""
+    global _bert
+    if _bert is None:
+        # 同時に複数のリクエストが来てもモデルの読み込みは1回だけにする
+        with _bert_lock:
+            if _bert is None:
+                import torch
+                from transformers import AutoTokenizer, AutoModel
+                tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+                model = AutoModel.from_pretrained(MODEL_NAME)
+                device = "cuda" if torch.cuda.is_available() else "cpu"
+                model.eval()
+                model.to(device)
+                if device == "cuda":
+                    # GPUではFP16で推論し（出力はfloat32に戻す）、FP32の行列演算にもTensor Core（TF32）を使わせる
+                    model.half()
+                    torch.backends.cuda.matmul.allow_tf32 = True
+                elif os.getenv("BERT_CPU_BF16") == "1":
+                    # BF16演算に対応したCPU（AVX512-BF16・AMX）向けのオプトイン設定（出力はfloat32に戻す）
+                    model.to(torch.bfloat16)
+                _bert = (tokenizer, model, device)
+    return _bert
+
+# 起動をまたいで再利用するBERTベクトルのディスクキャッシュ（モデル名とテキストのSHA-256をファイル名にする）
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "data/embedding_cache")
+
+def _embedding_cache_path(text: str) -> str:
+    digest = hashlib.sha256(f"{MODEL_NAME}\0{text}".encode("utf-8")).hexdigest()
+    # 1つのディレクトリにファイルが集中しないよう、ハッシュの先頭2文字でサブディレクトリを分ける
+    return os.path.join(EMBEDDING_CACHE_DIR, digest[:2], f"{digest}.npy")
+
+def _load_cached_embedding(text: str) -> Optional[np.ndarray]:
+    """ディスクキャッシュからBERTベクトルを読み込む（存在しない・読み込めない場合はNone）"""
+    try:
+        vector = np.load(_embedding_cache_path(text))
+        if vector.shape == (BERT_HIDDEN_SIZE,) and vector.dtype == np.float32:
+            return vector
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"BERTベクトルキャッシュの読み込みに失敗: {e}")
+    return None
+
+def _store_cached_embedding(text: str, vector: np.ndarray) -> None:
+    """BERTベクトルをディスクキャッシュに保存する（複数ワーカーから同時に書いても壊れないよう一時ファイル経由で置き換える）"""
+    try:
+        path = _embedding_cache_path(text)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.save(f, vector)
+        os.replace(temp_path, path)
+    except Exception as e:
+        logger.warning(f"BERTベクトルキャッシュの保存に失敗: {e}")
+
+def _compute_bert_embedding(text: str) -> np.ndarray:
+    import torch
+    tokenizer, model, device = _get_bert()
     inputs = tokenizer(text, return_tensors="pt", padding=True, truncation=True, max_length=128)
     inputs = {k: v.to(device) for k, v in inputs.items()}
-    with torch.no_grad():
+    with torch.inference_mode():
         outputs = model(**inputs)
-    cls_embedding = outputs.last_hidden_state[:, 0, :].cpu().numpy()
+    cls_embedding = outputs.last_hidden_state[:, 0, :].float().cpu().numpy()
     return cls_embedding.flatten()
+
+@functools.lru_cache(maxsize=4096)
+def get_bert_embedding_cached(text: str) -> np.ndarray:
+    """BERTベクトルをメモリ・ディスクのキャッシュ経由で取得する（共有されるため読み取り専用の配列を返す）"""
+    vector = _load_cached_embedding(text)
+    if vector is None:
+        vector = _compute_bert_embedding(text)
+        _store_cached_embedding(text, vector)
+    vector.setflags(write=False)
+    return vector
+
+def get_bert_embedding(text: str) -> np.ndarray:
+    return get_bert_embedding_cached(text).copy()
+
+def get_bert_embeddings_batch(texts: List[str], batch_size: int = 32) -> np.ndarray:
+    """複数テキストのBERTベクトル（CLSトークン）をバッチ推論でまとめて計算する。
+
+    長さの近いテキスト同士を同じバッチにしてパディングを減らし、結果は入力順で返す。
+    同じテキストは1回だけ推論し、ディスクキャッシュにあるテキストは推論しない。
+    """
+    embeddings = np.empty((len(texts), BERT_HIDDEN_SIZE), dtype=np.float32)
+    if not texts:
+        return embeddings
+    unique_texts = list(dict.fromkeys(texts))
+    unique_embeddings = {}
+    for text in unique_texts:
+        vector = _load_cached_embedding(text)
+        if vector is not None:
+            unique_embeddings[text] = vector
+    missing = sorted((text for text in unique_texts if text not in unique_embeddings), key=len)
+    if missing:
+        # すべてディスクキャッシュにある場合はモデルを読み込まない
+        import torch
+        tokenizer, model, device = _get_bert()
+        with torch.inference_mode():
+            for start in range(0, len(missing), batch_size):
+                batch_texts = missing[start:start + batch_size]
+                inputs = tokenizer(batch_texts, return_tensors="pt", padding=True, truncation=True, max_length=128)
+                inputs = {k: v.to(device) for k, v in inputs.items()}
+                outputs = model(**inputs)
+                batch_embeddings = outputs.last_hidden_state[:, 0, :].float().cpu().numpy()
+                for text, vector in zip(batch_texts, batch_embeddings):
+                    unique_embeddings[text] = vector
+                    _store_cached_embedding(text, vector)
+    for i, text in enumerate(texts):
+        embeddings[i] = unique_embeddings[text]
+    return embeddings
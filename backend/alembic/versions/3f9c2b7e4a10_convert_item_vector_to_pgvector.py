@@ -0,0 +1,51 @@
+"""convert item vector to pgvector
+
+Revision ID: 3f9c2b7e4a10
+Revises: d778a1e69f68
+Create Date: 2026-10-15 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c2b7e4a10'
+down_revision: Union[str, Sequence[str], None] = 'd778a1e69f68'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS vector')
+    # float[] の既存データはそのまま vector 型にキャストする
+    op.alter_column(
+        'items', 'vector',
+        existing_type=postgresql.ARRAY(sa.Float()),
+        type_=Vector(384),
+        existing_nullable=True,
+        postgresql_using='vector::vector(384)',
+        comment='品名・特徴の埋め込みベクトル（セマンティック検索用、pgvector）',
+        existing_comment='品名・特徴の埋め込みベクトル（セマンティック検索用）'
+    )
+    # コサイン距離による近傍探索用のHNSWインデックス
+    op.execute('CREATE INDEX ix_items_vector_hnsw ON items USING hnsw (vector vector_cosine_ops)')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP INDEX IF EXISTS ix_items_vector_hnsw')
+    op.alter_column(
+        'items', 'vector',
+        existing_type=Vector(384),
+        type_=postgresql.ARRAY(sa.Float()),
+        existing_nullable=True,
+        postgresql_using='vector::real[]::double precision[]',
+        comment='品名・特徴の埋め込みベクトル（セマンティック検索用）',
+        existing_comment='品名・特徴の埋め込みベクトル（セマンティック検索用、pgvector）'
+    )
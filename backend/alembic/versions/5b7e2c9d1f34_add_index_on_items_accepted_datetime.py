@@ -0,0 +1,29 @@
+"""add index on items accepted_datetime
+
+Revision ID: 5b7e2c9d1f34
+Revises: 8d41e6a0c5b2
+Create Date: 2026-10-15 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2c9d1f34'
+down_revision: Union[str, Sequence[str], None] = '8d41e6a0c5b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 登録時の同日件数カウント（受付日時の範囲検索）をインデックスで処理する
+    op.create_index('ix_items_accepted_datetime', 'items', ['accepted_datetime'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_items_accepted_datetime', table_name='items')
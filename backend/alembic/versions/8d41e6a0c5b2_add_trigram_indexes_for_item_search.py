@@ -0,0 +1,34 @@
+"""add trigram indexes for item search
+
+Revision ID: 8d41e6a0c5b2
+Revises: 3f9c2b7e4a10
+Create Date: 2026-10-15 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d41e6a0c5b2'
+down_revision: Union[str, Sequence[str], None] = '3f9c2b7e4a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # キーワード検索（LIKE '%kw%' の部分一致）をインデックスで処理できるよう、トライグラムのGINインデックスを作成
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.execute('CREATE INDEX ix_items_name_trgm ON items USING gin (name gin_trgm_ops)')
+    op.execute('CREATE INDEX ix_items_features_trgm ON items USING gin (features gin_trgm_ops)')
+    op.execute('CREATE INDEX ix_items_found_place_trgm ON items USING gin (found_place gin_trgm_ops)')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP INDEX IF EXISTS ix_items_found_place_trgm')
+    op.execute('DROP INDEX IF EXISTS ix_items_features_trgm')
+    op.execute('DROP INDEX IF EXISTS ix_items_name_trgm')
@@ -8,6 +8,7 @@ from app.database import get_db, Base
 from app.models import Item, Facility
 from app.security import security_manager
 from app.ai_engine import ai_engine
+from app import classification_service as classification_module
 import tempfile
 import os
 from PIL import Image
@@ -78,6 +79,51 @@ def sample_image():
         yield tmp_file.name
     os.unlink(tmp_file.name)
 
+@pytest.fixture
+def keyword_classification_data():
+    """キーワード照合テスト用の分類定義（重なり・同じ開始位置・同点のキーワードを含む）"""
+    def medium(medium_category_id, priority, keywords):
+        return {
+            "medium_category_id": medium_category_id,
+            "medium_category_name_ja": medium_category_id,
+            "priority": priority,
+            "keywords": [{"term": term, "weight": weight} for term, weight in keywords]
+        }
+    return [{
+        "large_category_id": "test",
+        "large_category_name_ja": "テスト",
+        "medium_categories": [
+            # 「バッグ」は「ハンドバッグ」の途中から始まる
+            medium("handbag", 50, [("ハンドバッグ", 1.0)]),
+            medium("bag", 50, [("バッグ", 1.0)]),
+            # 「財布」と「財布ケース」は同じ位置から始まる（先に定義された「財布」が優先される）
+            medium("wallet", 80, [("財布", 1.0)]),
+            medium("wallet_case", 40, [("財布ケース", 1.0)]),
+            # スコアも優先度も同じ中分類
+            medium("pen", 50, [("ペン", 1.0)]),
+            medium("memo", 50, [("メモ", 1.0)]),
+            # スコアが同じで優先度が異なる中分類（どちらも1.0）
+            medium("key_low", 50, [("鍵", 2.0)]),
+            medium("key_high", 100, [("カギ", 0.5)]),
+        ]
+    }]
+
+@pytest.fixture
+def classification_services(monkeypatch, keyword_classification_data):
+    """Aho-Corasickで照合するサービスと正規表現で照合するサービスの組"""
+    pytest.importorskip("ahocorasick")
+    monkeypatch.setattr(
+        classification_module.ClassificationService,
+        "_load_classification_data",
+        lambda self: keyword_classification_data
+    )
+    automaton_service = classification_module.ClassificationService()
+    monkeypatch.setattr(classification_module, "ahocorasick", None)
+    regex_service = classification_module.ClassificationService()
+    assert automaton_service._keyword_automaton is not None
+    assert regex_service._keyword_automaton is None
+    return automaton_service, regex_service
+
 class TestAuthentication:
     """認証機能のテスト"""
     
@@ -160,6 +206,16 @@ class TestItemRegistration:
         data = response.json()
         assert "umb" in data["storage_location"]
 
+    def test_create_items_bulk(self, client, setup_database, sample_item):
+        """アイテム一括登録テスト（通し番号が連番になること）"""
+        response = client.post("/items/bulk", json=[sample_item, sample_item])
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) == 2
+        assert data[0]["item_id"].endswith("-0001")
+        assert data[1]["item_id"].endswith("-0002")
+
 class TestItemSearch:
     """アイテム検索機能のテスト"""
     
@@ -186,6 +242,24 @@ class TestItemSearch:
         data = response.json()
         assert len(data) > 0
     
+    def test_search_items_limit(self, client, setup_database, sample_item):
+        """検索件数上限テスト"""
+        for name in ["ハンドバッグ", "トートバッグ", "ショルダーバッグ"]:
+            item = sample_item.copy()
+            item["name"] = name
+            client.post("/items", json=item)
+
+        response = client.get("/items/search?keywords=バッグ&limit=2")
+        assert response.status_code == 200
+        assert len(response.json()) == 2
+
+        response = client.get("/items/search?keywords=バッグ&semantic_search=true&limit=1")
+        assert response.status_code == 200
+        assert len(response.json()) == 1
+
+        response = client.get("/items/search?keywords=バッグ&limit=0")
+        assert response.status_code == 422
+
     def test_search_items_date_range(self, client, setup_database, sample_item):
         """日付範囲検索テスト"""
         # アイテムを登録
@@ -217,9 +291,13 @@ class TestAIEngine:
         text = "ハンドバッグ 黒色 革製"
         vector = ai_engine.generate_vector(text)
         
-        assert isinstance(vector, list)
+        assert isinstance(vector, np.ndarray)
+        assert vector.dtype == np.float32
         assert len(vector) > 0
-        assert all(isinstance(x, float) for x in vector)
+        
+        vector_list = ai_engine.generate_vector_list(text)
+        assert isinstance(vector_list, list)
+        assert all(isinstance(x, float) for x in vector_list)
     
     def test_calculate_similarity(self):
         """類似度計算テスト"""
@@ -231,6 +309,101 @@ class TestAIEngine:
         assert isinstance(similarity, float)
         assert 0.0 <= similarity <= 1.0
 
+    def test_corpus_save_and_load(self, tmp_path):
+        """検索対象ベクトルの保存・読み込みテスト"""
+        matrix_path = str(tmp_path / "corpus.npy")
+        ids_path = str(tmp_path / "corpus_ids.json")
+        texts = ["ハンドバッグ 黒色 革製", "折りたたみ傘 青", "財布 茶色"]
+        ai_engine.register_corpus(["item-1", "item-2", "item-3"], ai_engine.generate_vectors(texts))
+        expected = ai_engine.search_similar_items("ハンドバッグ", top_k=3)
+        ai_engine.save_corpus(matrix_path, ids_path)
+
+        # 登録内容を消してからファイルを読み込み、同じ検索結果になることを確認
+        ai_engine.register_corpus([], np.zeros((0, 384), dtype=np.float32))
+        assert ai_engine.search_similar_items("ハンドバッグ", top_k=3) == []
+        assert ai_engine.load_corpus(matrix_path, ids_path)
+
+        results = ai_engine.search_similar_items("ハンドバッグ", top_k=3)
+        assert results == expected
+        assert results[0][0] == "item-1"
+
+    def test_recognize_batch(self, client, sample_image):
+        """一括画像認識テスト"""
+        with open(sample_image, "rb") as f:
+            content = f.read()
+        files = [("files", (f"test{i}.jpg", content, "image/jpeg")) for i in range(2)]
+        response = client.post("/recognize/batch", files=files)
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) == 2
+        assert all("category_large" in result for result in data)
+    
+    def test_recognize_batch_too_many_files(self, client, sample_image):
+        """一括画像認識のファイル数上限テスト"""
+        with open(sample_image, "rb") as f:
+            content = f.read()
+        count = security_manager.max_batch_files + 1
+        files = [("files", (f"test{i}.jpg", content, "image/jpeg")) for i in range(count)]
+        response = client.post("/recognize/batch", files=files)
+        
+        assert response.status_code == 400
+
+class TestClassificationService:
+    """キーワード分類のテスト"""
+    
+    @pytest.mark.parametrize("text", [
+        "ハンドバッグ",
+        "バッグ",
+        "バッグとハンドバッグ",
+        "財布",
+        "財布ケース",
+        "財布ケースとバッグ",
+        "ペンメモ",
+        "メモペン",
+        "鍵カギ",
+        "該当なし",
+    ])
+    def test_automaton_matches_regex(self, classification_services, text):
+        """Aho-Corasickと正規表現で同じ照合・分類結果になることのテスト"""
+        automaton_service, regex_service = classification_services
+        normalized_text = classification_module.normalize_text(text)
+        regex_matches = [
+            (match.end(), regex_service._keyword_id_by_norm[match.group(0)])
+            for match in regex_service.keyword_patterns[0].finditer(normalized_text)
+        ]
+        
+        assert automaton_service._find_keyword_matches(normalized_text) == regex_matches
+        assert automaton_service.classify(text) == regex_service.classify(text)
+    
+    def test_overlapping_keywords(self, classification_services):
+        """重なるキーワードは左から順に重ならないものを採用するテスト"""
+        for service in classification_services:
+            result = service.classify("ハンドバッグ")
+            assert result["medium_category_id"] == "handbag"
+            assert [k["keyword"] for k in result["matched_keywords"]] == ["ハンドバッグ"]
+    
+    def test_same_start_keywords(self, classification_services):
+        """同じ位置から始まるキーワードは先に定義されたものを優先するテスト"""
+        for service in classification_services:
+            assert service.classify("財布ケース")["medium_category_id"] == "wallet"
+    
+    def test_select_best_match_tie_breaking(self, classification_services):
+        """同点の中分類は優先度、さらに同点なら先にマッチしたものを選ぶテスト"""
+        automaton_service, _ = classification_services
+        keyword_ids = {term: i for i, term in enumerate(automaton_service._keyword_terms)}
+        
+        def best(*terms):
+            matches = [(end, keyword_ids[term]) for end, term in enumerate(terms, 1)]
+            return automaton_service._select_best_match(matches, "")["medium_category_id"]
+        
+        assert best("ペン", "メモ") == "pen"
+        assert best("メモ", "ペン") == "memo"
+        assert best("鍵", "カギ") == "key_high"
+        assert best("カギ", "鍵") == "key_high"
+        # 合計スコアが高ければ優先度・出現順より優先される
+        assert best("ペン", "メモ", "メモ") == "memo"
+
 class TestSecurity:
     """セキュリティ機能のテスト"""
     